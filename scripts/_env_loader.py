@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Load config/settings.env once per process, with or without python-dotenv
+"""
+
+import os
+
+FALLBACK_SETTINGS = (
+    '/opt/media-pipeline/config/settings.env',
+    '/root/.config/media-pipeline/settings.env',
+)
+
+_loaded = False
+
+
+def _parse_env_file(path):
+    """Parse KEY=VALUE lines into a dict"""
+    values = {}
+    with open(path, 'r') as f:
+        for line in f:
+            if '=' in line and not line.startswith('#'):
+                key, value = line.strip().split('=', 1)
+                values[key] = value.strip('"').strip("'")
+    return values
+
+
+def load_env_once(path='config/settings.env', fallbacks=FALLBACK_SETTINGS):
+    """Load settings into os.environ on the first call only"""
+    global _loaded
+    if _loaded:
+        return
+    _loaded = True
+
+    try:
+        from dotenv import load_dotenv
+        load_dotenv(path)
+        return
+    except ImportError:
+        print("⚠️  Warning: python-dotenv not installed, using system environment variables")
+
+    denied = False
+    for settings_file in fallbacks:
+        if not os.path.exists(settings_file):
+            continue
+        try:
+            os.environ.update(_parse_env_file(settings_file))
+            return
+        except PermissionError:
+            print(f"⚠️  Warning: Cannot read {settings_file} due to permissions")
+            denied = True
+    if denied:
+        print(f"Run: sudo chmod 644 {fallbacks[-1]}")
@@ -8,6 +8,7 @@ import os
 import re
 import sys
 import shutil
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Tuple
 try:  # Allow execution both as module and standalone script
@@ -189,12 +190,24 @@ def _derive_label(path: Path, fallback_index: int) -> str:
 def get_deduplication_targets() -> List[Tuple[str, str]]:
     """Return labeled directories that should run through deduplication."""
 
+    return list(_resolve_deduplication_targets(
+        os.getenv("ORIGINALS_DIR", "originals"),
+        os.getenv("UPLOADED_ICLOUD_DIR"),
+        os.getenv("UPLOADED_PIXEL_DIR"),
+        os.getenv("DEDUPLICATION_DIRECTORIES", ""),
+    ))
+
+
+@lru_cache(maxsize=1)
+def _resolve_deduplication_targets(originals_dir, uploaded_icloud_dir, uploaded_pixel_dir, custom_paths):
+    """Normalize and label target directories for one set of env values."""
+
     targets: List[Tuple[str, str]] = []
 
     defaults = [
-        ("originals", os.getenv("ORIGINALS_DIR", "originals")),
-        ("uploaded_icloud", os.getenv("UPLOADED_ICLOUD_DIR")),
-        ("uploaded_pixel", os.getenv("UPLOADED_PIXEL_DIR")),
+        ("originals", originals_dir),
+        ("uploaded_icloud", uploaded_icloud_dir),
+        ("uploaded_pixel", uploaded_pixel_dir),
     ]
 
     seen_paths = set()
@@ -207,7 +220,6 @@ def get_deduplication_targets() -> List[Tuple[str, str]]:
         seen_paths.add(normalized)
         targets.append((label, normalized))
 
-    custom_paths = os.getenv("DEDUPLICATION_DIRECTORIES", "")
     if custom_paths:
         raw_entries = re.split(r"[\n,]", custom_paths)
         index = 1
@@ -223,7 +235,7 @@ def get_deduplication_targets() -> List[Tuple[str, str]]:
             targets.append((label, normalized))
             index += 1
 
-    return targets
+    return tuple(targets)
 
 def main():
     """Main deduplication function"""
@@ -7,10 +7,13 @@ import os
 import sys
 
 import pytest
-from dotenv import load_dotenv
+try:
+    from ._env_loader import load_env_once
+except ImportError:
+    from _env_loader import load_env_once
 
 # Load environment variables
-load_dotenv("config/settings.env")
+load_env_once()
 
 RUN_PROD_TESTS = os.environ.get("RUN_PROD_TESTS") == "1"
 pytestmark = pytest.mark.skipif(
@@ -20,6 +23,34 @@ pytestmark = pytest.mark.skipif(
 
 USING_PYTEST = "pytest" in sys.modules
 
+_CLIENT = None
+
+
+def get_shared_client():
+    """Create the Supabase client once and reuse it for every check"""
+    global _CLIENT
+    if _CLIENT is None:
+        from supabase import create_client
+        _CLIENT = create_client(
+            os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"), **_client_kwargs()
+        )
+    return _CLIENT
+
+
+def _client_kwargs():
+    """Keep-alive httpx pool with transport retries, where supabase supports it"""
+    try:
+        import httpx
+        from supabase.lib.client_options import SyncClientOptions
+        http_client = httpx.Client(
+            limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=40),
+            transport=httpx.HTTPTransport(retries=3),
+            timeout=httpx.Timeout(30.0),
+        )
+        return {"options": SyncClientOptions(httpx_client=http_client)}
+    except (ImportError, TypeError):
+        return {}
+
 
 def _test_result(success, failure_message="Test reported failure"):
     if USING_PYTEST:
@@ -59,13 +90,8 @@ def test_supabase_connection():
     print("\n=== Supabase Connection Test ===")
     
     try:
-        from supabase import create_client
-        
-        supabase_url = os.getenv("SUPABASE_URL")
-        supabase_key = os.getenv("SUPABASE_KEY")
-        
         print("Creating Supabase client...")
-        supabase = create_client(supabase_url, supabase_key)
+        supabase = get_shared_client()
         print("✓ Supabase client created successfully")
         
         # Test a simple query
@@ -11,7 +11,6 @@ from functools import wraps
 from typing import Optional, Set
 
 from dotenv import load_dotenv
-from supabase import create_client
 
 try:  # Support both package and script execution
     from .local_db_manager import (
@@ -87,6 +86,7 @@ def get_supabase_client(force_refresh: bool = False):
         return None
 
     try:
+        from supabase import create_client  # deferred: the client stack is slow to import
         _supabase_client = create_client(SUPABASE_URL, SUPABASE_KEY)
     except Exception as exc:  # pragma: no cover - defensive: network/auth failures
         logging.error(f"Failed to initialize Supabase client: {exc}")
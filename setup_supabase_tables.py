@@ -6,46 +6,14 @@ Creates all required tables for the media pipeline
 
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-# Try to load dotenv, but don't fail if it's not available
-try:
-    from dotenv import load_dotenv
-    load_dotenv('config/settings.env')
-except ImportError:
-    print("⚠️  Warning: python-dotenv not installed, using system environment variables")
-    # Try to load from the virtual environment's settings
-    venv_settings = '/opt/media-pipeline/config/settings.env'
-    if os.path.exists(venv_settings):
-        try:
-            with open(venv_settings, 'r') as f:
-                for line in f:
-                    if '=' in line and not line.startswith('#'):
-                        key, value = line.strip().split('=', 1)
-                        os.environ[key] = value.strip('"').strip("'")
-        except PermissionError:
-            print("⚠️  Warning: Cannot read settings.env due to permissions")
-            # Try to read from the actual file location
-            actual_file = '/root/.config/media-pipeline/settings.env'
-            if os.path.exists(actual_file):
-                try:
-                    with open(actual_file, 'r') as f:
-                        for line in f:
-                            if '=' in line and not line.startswith('#'):
-                                key, value = line.strip().split('=', 1)
-                                os.environ[key] = value.strip('"').strip("'")
-                except PermissionError:
-                    print("❌ Error: Cannot read settings file due to permissions")
-                    print("Run: sudo chmod 644 /root/.config/media-pipeline/settings.env")
+from scripts._env_loader import load_env_once
 
-try:
-    from supabase import create_client, Client
-except ImportError:
-    print("❌ Error: supabase package not installed")
-    print("Run: sudo -u media-pipeline /opt/media-pipeline/venv/bin/pip install supabase")
-    sys.exit(1)
+load_env_once()
 
-from supabase_schema import INDEXES, TABLES
+from supabase_schema import COLUMNS, FUNCTIONS, INDEXES, TABLES
 
 def print_status(status, message):
     """Print colored status messages"""
@@ -57,6 +25,10 @@ def print_status(status, message):
     }
     print(f"{colors.get(status, '')} {message}")
 
+def _exec_sql(supabase, sql):
+    """Run one statement through the exec_sql RPC, raising if it fails"""
+    return supabase.rpc('exec_sql', {'sql': sql.strip()}).execute()
+
 def create_tables(supabase):
     """Create all required tables"""
     print_status("INFO", "Creating database tables...")
@@ -67,15 +39,21 @@ def create_tables(supabase):
         # Execute table creation commands
         for i, sql in enumerate(sql_commands, 1):
             print_status("INFO", f"Creating table {i}/{len(sql_commands)}...")
-            result = supabase.rpc('exec_sql', {'sql': sql.strip()})
+            _exec_sql(supabase, sql)
             print_status("SUCCESS", f"Table {i} created successfully")
         
         # Execute index creation commands
         print_status("INFO", "Creating indexes...")
         for i, sql in enumerate(INDEXES, 1):
-            result = supabase.rpc('exec_sql', {'sql': sql})
+            _exec_sql(supabase, sql)
             print_status("SUCCESS", f"Index {i} created successfully")
         
+        # Helper functions used by the setup checks
+        print_status("INFO", "Creating helper functions...")
+        for i, sql in enumerate(FUNCTIONS, 1):
+            _exec_sql(supabase, sql)
+            print_status("SUCCESS", f"Function {i} created successfully")
+        
         print_status("SUCCESS", "All tables and indexes created successfully!")
         return True
         
@@ -89,17 +67,44 @@ def test_tables(supabase):
     
     tables_to_test = list(TABLES.keys())
     
-    all_good = True
+    # One round trip for every table's metadata
+    try:
+        found = supabase.rpc('get_schema_info', {'tables': tables_to_test}).execute().data or {}
+    except Exception as e:
+        print_status("WARNING", f"get_schema_info unavailable ({e}), probing tables one by one")
+    else:
+        all_good = True
+        for table in tables_to_test:
+            if table not in found:
+                print_status("ERROR", f"Table '{table}' is not accessible: not found in public schema")
+                all_good = False
+                continue
+            missing_columns = COLUMNS[table].difference(found[table])
+            if missing_columns:
+                print_status("ERROR", f"Table '{table}' is missing columns: {', '.join(sorted(missing_columns))}")
+                all_good = False
+            else:
+                print_status("SUCCESS", f"Table '{table}' is accessible")
+        return all_good
     
-    for table in tables_to_test:
+    def probe(table):
         try:
-            result = supabase.table(table).select("*").limit(1).execute()
-            print_status("SUCCESS", f"Table '{table}' is accessible")
+            supabase.table(table).select("*").limit(1).execute()
+            return None
         except Exception as e:
-            print_status("ERROR", f"Table '{table}' is not accessible: {str(e)}")
-            all_good = False
+            return e
     
-    return all_good
+    # Probes are independent; the shared client's HTTP pool serves them concurrently
+    with ThreadPoolExecutor(max_workers=len(tables_to_test)) as executor:
+        errors = list(executor.map(probe, tables_to_test))
+    
+    for table, error in zip(tables_to_test, errors):
+        if error is None:
+            print_status("SUCCESS", f"Table '{table}' is accessible")
+        else:
+            print_status("ERROR", f"Table '{table}' is not accessible: {str(error)}")
+    
+    return all(error is None for error in errors)
 
 def main():
     """Main function"""
@@ -116,9 +121,16 @@ def main():
         print_status("ERROR", "SUPABASE_URL and SUPABASE_KEY must be set in environment variables")
         return False
     
+    try:
+        from supabase import create_client
+    except ImportError:
+        print("❌ Error: supabase package not installed")
+        print("Run: sudo -u media-pipeline /opt/media-pipeline/venv/bin/pip install supabase")
+        return False
+    
     try:
         # Create Supabase client
-        supabase: Client = create_client(supabase_url, supabase_key)
+        supabase = create_client(supabase_url, supabase_key)
         print_status("SUCCESS", f"Connected to Supabase: {supabase_url}")
         
         # Create tables
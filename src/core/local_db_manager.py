@@ -28,6 +28,14 @@ except ImportError:
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         print(f"{timestamp} [{level.upper()}] {step}: {message}")
 
+class _PreparingConnection(psycopg2.extensions.connection):
+    """Connection that remembers which statements have been PREPAREd in its session"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared = set()
+
+
 class LocalDBManager:
     def __init__(self):
         """Initialize local PostgreSQL database manager"""
@@ -43,13 +51,19 @@ class LocalDBManager:
     
     def _get_db_config(self) -> Dict[str, Any]:
         """Get database configuration"""
-        return {
+        config = {
             'host': os.getenv('LOCAL_DB_HOST', 'localhost'),
             'port': int(os.getenv('LOCAL_DB_PORT', 5432)),
             'database': os.getenv('LOCAL_DB_NAME', 'media_pipeline'),
             'user': os.getenv('LOCAL_DB_USER', 'media_pipeline'),
             'password': os.getenv('LOCAL_DB_PASSWORD', 'media_pipeline_2024')
         }
+        # Pool-wide override is opt-in: media_files/batches rows back deduplication and
+        # must survive a crash, so by default only log/2FA writes commit asynchronously
+        synchronous_commit = os.getenv('LOCAL_DB_SYNCHRONOUS_COMMIT')
+        if synchronous_commit:
+            config['options'] = f"-c synchronous_commit={synchronous_commit}"
+        return config
     
     def _test_connection(self):
         """Test database connection"""
@@ -67,7 +81,7 @@ class LocalDBManager:
             if self.connection_pool:
                 return self.connection_pool.pop()
         
-        return psycopg2.connect(**self.db_config)
+        return psycopg2.connect(**self.db_config, connection_factory=_PreparingConnection)
     
     def _return_connection(self, conn):
         """Return connection to pool"""
@@ -77,13 +91,18 @@ class LocalDBManager:
             else:
                 conn.close()
     
-    def _execute_query(self, query: str, params: tuple = None, fetch: bool = False, commit: bool = True) -> Optional[List[Dict]]:
+    def _execute_query(self, query: str, params: tuple = None, fetch: bool = False, commit: bool = True,
+                       durable: bool = True) -> Optional[List[Dict]]:
         """Execute database query with error handling"""
         conn = None
         try:
             conn = self._get_connection()
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             
+            if not durable:
+                # Commit without waiting for the WAL flush; a crash can lose the last
+                # few hundred ms of these rows but never corrupts the database
+                cursor.execute("SET LOCAL synchronous_commit = off")
             cursor.execute(query, params)
             
             if commit:
@@ -105,6 +124,87 @@ class LocalDBManager:
                 cursor.close()
                 self._return_connection(conn)
     
+    def _execute_prepared(self, name: str, query: str, params: tuple = (), fetch: bool = False) -> Optional[List[Dict]]:
+        """Execute a $1..$n statement as a prepared statement, parsed and planned once per connection"""
+        conn = None
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            
+            if name not in conn.prepared:
+                cursor.execute(f"PREPARE {name} AS {query}")
+                conn.prepared.add(name)
+            
+            if params:
+                cursor.execute(f"EXECUTE {name} ({', '.join(['%s'] * len(params))})", params)
+            else:
+                cursor.execute(f"EXECUTE {name}")
+            conn.commit()
+            
+            if fetch:
+                return [dict(row) for row in cursor.fetchall()]
+            
+            return None
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+                # Start this connection's statements over rather than guess which survived
+                try:
+                    cursor.execute("DEALLOCATE ALL")
+                    conn.commit()
+                    conn.prepared.clear()
+                except Exception:
+                    pass
+            log_step("local_db_manager", f"Database error: {e}", "error")
+            raise
+        finally:
+            if conn:
+                cursor.close()
+                self._return_connection(conn)
+    
+    def _iter_query(self, query: str, params: tuple = None, batch_size: int = 1000):
+        """Yield rows of a SELECT through a server-side cursor, batch_size rows per round trip"""
+        conn = self._get_connection()
+        try:
+            # Named cursors live inside a transaction; the rollback below ends it
+            with conn.cursor(name=f"iter_{id(conn)}", cursor_factory=psycopg2.extras.RealDictCursor) as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(query, params)
+                for row in cursor:
+                    yield dict(row)
+        except Exception as e:
+            log_step("local_db_manager", f"Database error: {e}", "error")
+            raise
+        finally:
+            conn.rollback()
+            self._return_connection(conn)
+    
+    def _execute_values(self, query: str, rows: List[tuple], fetch: bool = False, page_size: int = 500) -> Optional[List[Dict]]:
+        """Execute a multi-row INSERT (query has a single VALUES %s) in one transaction"""
+        conn = None
+        try:
+            conn = self._get_connection()
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            
+            result = psycopg2.extras.execute_values(cursor, query, rows, page_size=page_size, fetch=fetch)
+            conn.commit()
+            
+            if fetch:
+                return [dict(row) for row in result]
+            
+            return None
+            
+        except Exception as e:
+            if conn:
+                conn.rollback()
+            log_step("local_db_manager", f"Database error: {e}", "error")
+            raise
+        finally:
+            if conn:
+                cursor.close()
+                self._return_connection(conn)
+    
     # =====================================================
     # PIPELINE LOGS OPERATIONS
     # =====================================================
@@ -125,7 +225,7 @@ class LocalDBManager:
             datetime.now()
         )
         
-        result = self._execute_query(query, params, fetch=True)
+        result = self._execute_query(query, params, fetch=True, durable=False)
         log_id = result[0]['id'] if result else None
         
         log_step("local_db_manager", f"Logged pipeline step: {pipeline_step} - {status}", "debug")
@@ -199,7 +299,7 @@ class LocalDBManager:
         expires_at = datetime.now() + timedelta(minutes=expires_minutes)
         params = (request_id, pipeline_step, expires_at)
         
-        self._execute_query(query, params)
+        self._execute_query(query, params, durable=False)
         log_step("local_db_manager", f"Created 2FA request: {request_id}", "debug")
         return True
     
@@ -220,7 +320,7 @@ class LocalDBManager:
         completed_at = datetime.now() if status in ['completed', 'expired'] else None
         params = (status, code, completed_at, request_id)
         
-        self._execute_query(query, params)
+        self._execute_query(query, params, durable=False)
         log_step("local_db_manager", f"Updated 2FA request {request_id}: {status}", "debug")
         return True
     
@@ -233,6 +333,17 @@ class LocalDBManager:
         """
         return self._execute_query(query, (datetime.now(),), fetch=True) or []
     
+    def get_latest_pending_2fa_request(self) -> Optional[Dict]:
+        """Get the most recently created pending, unexpired 2FA request"""
+        query = """
+            SELECT * FROM telegram_2fa_requests 
+            WHERE status = 'pending' AND expires_at > %s
+            ORDER BY created_at DESC
+            LIMIT 1
+        """
+        result = self._execute_query(query, (datetime.now(),), fetch=True)
+        return result[0] if result else None
+    
     def get_unsynced_2fa_requests(self, limit: int = 100) -> List[Dict]:
         """Get 2FA requests that haven't been synced to Supabase"""
         query = """
@@ -8,7 +8,7 @@ import os
 import sys
 import subprocess
 from pathlib import Path
-from utils.utils import log_step, ensure_directory_exists, create_media_file_record, create_batch_record, update_batch_status, calculate_file_hash
+from utils.utils import log_step, ensure_directory_exists, create_media_file_records, create_batch_record, inspect_file, update_batch_status, calculate_file_hash
 
 def check_icloudpd_installed():
     """Check if icloudpd is installed and accessible"""
@@ -163,29 +163,30 @@ def track_downloaded_files_in_database(originals_dir, batch_id=None):
             log_step("download_from_icloud", "No media files found to track", "warning")
             return 0
         
+        # Stat each file once; the batch total and the records both use it. A file that
+        # vanished or can't be read is tracked with size 0 rather than aborting the batch
+        file_stats = {}
+        for file_path in media_files:
+            try:
+                file_stats[file_path] = inspect_file(file_path)
+            except OSError as e:
+                log_step("download_from_icloud", f"Could not stat {file_path}: {e}", "warning")
+                file_stats[file_path] = None
+        
         # Create batch record if not provided
         if not batch_id:
             batch_id = create_batch_record(
                 source_type="icloud",
                 file_count=len(media_files),
-                total_size=sum(os.path.getsize(f) for f in media_files if os.path.exists(f))
+                total_size=sum(st.st_size for st in file_stats.values() if st)
             )
         
-        # Track each file in database
-        tracked_count = 0
-        for file_path in media_files:
-            try:
-                file_size = os.path.getsize(file_path) if os.path.exists(file_path) else 0
-                file_id = create_media_file_record(
-                    file_path=file_path,
-                    file_size=file_size,
-                    source_type="icloud",
-                    batch_id=batch_id
-                )
-                if file_id:
-                    tracked_count += 1
-            except Exception as e:
-                log_step("download_from_icloud", f"Failed to track file {file_path}: {e}", "error")
+        # Track all files in database with one multi-row INSERT
+        records = [
+            (file_path, st.st_size if st else 0, "icloud", batch_id)
+            for file_path, st in file_stats.items()
+        ]
+        tracked_count = sum(1 for file_id in create_media_file_records(records) if file_id)
         
         log_step("download_from_icloud", f"Tracked {tracked_count}/{len(media_files)} files in database", "success")
         return tracked_count
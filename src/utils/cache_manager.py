@@ -9,13 +9,18 @@ import sys
 import json
 import time
 import threading
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 import sqlite3
 import hashlib
 import requests
 
+try:
+    import orjson  # Optional: C JSON codec for cache values and payloads
+except ImportError:
+    orjson = None
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -32,6 +37,30 @@ def log_step(step, message, level="info"):
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     print(f"{timestamp} [{level.upper()}] {step}: {message}")
 
+# Long-lived entries live in the main cache file; write-heavy short-TTL
+# endpoints go to a separately attached file so their WAL writes don't
+# contend with the main cache.
+_CACHE_SCHEMAS = ('main', 'hot')
+
+_ALL_ENTRIES_VIEW = '''
+    CREATE TEMP VIEW IF NOT EXISTS all_cache_entries AS
+    SELECT 'main' AS db, * FROM main.cache_entries
+    UNION ALL
+    SELECT 'hot' AS db, * FROM hot.cache_entries
+'''
+
+def _json_dumps(data, sort_keys: bool = False) -> bytes:
+    """Serialize to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(data, sort_keys=sort_keys).encode()
+
+def _json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 class UnifiedCacheManager:
     def __init__(self):
         """Initialize unified cache manager"""
@@ -46,12 +75,24 @@ class UnifiedCacheManager:
         self.cache_dir.mkdir(exist_ok=True)
         
         self.db_path = self.cache_dir / "unified_cache.db"
+        self.hot_db_path = self.cache_dir / "cache_hot.db"
         self.stats_path = self.cache_dir / "cache_stats.json"
         
+        # HTTP settings (built once, reused for every Supabase call)
+        self._base_url = f"{self.supabase_url}/rest/v1/"
+        self._session = requests.Session()
+        self._session.headers.update({
+            'apikey': self.supabase_key,
+            'Authorization': f'Bearer {self.supabase_key}',
+            'Content-Type': 'application/json'
+        })
+        self._post_headers = {'Prefer': 'return=representation'}
+        
         # Cache settings
         self.default_ttl = 300  # 5 minutes
         self.max_cache_size = 1000  # Maximum cached items
         self.batch_size = 50  # Batch operations size
+        self.hot_endpoints = {'pipeline_logs'}  # Short-TTL, write-heavy endpoints
         
         # Statistics
         self.stats = self._load_stats()
@@ -62,38 +103,63 @@ class UnifiedCacheManager:
         
         log_step("unified_cache_manager", "Unified cache manager initialized", "info")
     
+    def _connect(self, timeout: float = 30) -> sqlite3.Connection:
+        """Open the main cache database with the hot database attached as 'hot'"""
+        conn = sqlite3.connect(self.db_path, timeout=timeout)
+        conn.execute('ATTACH DATABASE ? AS hot', (str(self.hot_db_path),))
+        conn.execute('PRAGMA journal_mode=WAL')  # Applies to every attached database
+        return conn
+    
+    def _cache_table(self, endpoint: str) -> str:
+        """Return the qualified cache table holding entries for an endpoint"""
+        return 'hot.cache_entries' if endpoint in self.hot_endpoints else 'main.cache_entries'
+    
     def _init_database(self):
         """Initialize cache database"""
         try:
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                conn.execute('PRAGMA journal_mode=WAL')  # Use WAL mode for better concurrency
+            with self._connect() as conn:
                 conn.execute('PRAGMA synchronous=NORMAL')  # Faster writes
                 cursor = conn.cursor()
                 
-                # Create cache table
-                cursor.execute('''
-                    CREATE TABLE IF NOT EXISTS cache_entries (
-                        key TEXT PRIMARY KEY,
-                        value TEXT NOT NULL,
-                        endpoint TEXT NOT NULL,
-                        params TEXT,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        expires_at TIMESTAMP NOT NULL,
-                        access_count INTEGER DEFAULT 0,
-                        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                ''')
-                
-                # Create indexes
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_endpoint ON cache_entries(endpoint)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_expires_at ON cache_entries(expires_at)')
-                cursor.execute('CREATE INDEX IF NOT EXISTS idx_last_accessed ON cache_entries(last_accessed)')
+                for schema in _CACHE_SCHEMAS:
+                    self._init_cache_table(cursor, schema)
                 
                 conn.commit()
                 
         except Exception as e:
             log_step("unified_cache_manager", f"Error initializing cache database: {e}", "error")
     
+    def _init_cache_table(self, cursor: sqlite3.Cursor, schema: str):
+        """Create the cache table and indexes in one attached database"""
+        # Drop the legacy rowid table (hex TEXT keys); cached rows are disposable
+        cursor.execute(f'''
+            SELECT sql FROM {schema}.sqlite_master
+            WHERE type = 'table' AND name = 'cache_entries'
+        ''')
+        existing = cursor.fetchone()
+        if existing and 'WITHOUT ROWID' not in existing[0].upper():
+            cursor.execute(f'DROP TABLE {schema}.cache_entries')
+            log_step("unified_cache_manager", f"Migrated {schema} cache table to WITHOUT ROWID layout", "info")
+        
+        # Create cache table (clustered on the raw digest key)
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS {schema}.cache_entries (
+                key BLOB PRIMARY KEY,
+                value BLOB NOT NULL,
+                endpoint TEXT NOT NULL,
+                params BLOB,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                expires_at TIMESTAMP NOT NULL,
+                access_count INTEGER DEFAULT 0,
+                last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            ) WITHOUT ROWID
+        ''')
+        
+        # Create indexes
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_endpoint ON cache_entries(endpoint)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_expires_at ON cache_entries(expires_at)')
+        cursor.execute(f'CREATE INDEX IF NOT EXISTS {schema}.idx_last_accessed ON cache_entries(last_accessed)')
+    
     def _load_stats(self) -> Dict:
         """Load cache statistics"""
         try:
@@ -120,25 +186,25 @@ class UnifiedCacheManager:
         except Exception as e:
             log_step("unified_cache_manager", f"Error saving stats: {e}", "warning")
     
-    def _generate_cache_key(self, endpoint: str, params: Dict = None) -> str:
-        """Generate cache key for request"""
-        key_data = f"{endpoint}:{json.dumps(params or {}, sort_keys=True)}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+    def _generate_cache_key(self, endpoint: str, params: Dict = None) -> bytes:
+        """Generate cache key for request (raw 16-byte digest)"""
+        key_data = endpoint.encode() + b":" + _json_dumps(params or {}, sort_keys=True)
+        return hashlib.md5(key_data).digest()
     
     def _cleanup_expired(self):
         """Remove expired cache entries"""
         try:
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                conn.execute('PRAGMA journal_mode=WAL')
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Delete expired entries
-                cursor.execute('''
-                    DELETE FROM cache_entries 
-                    WHERE expires_at < CURRENT_TIMESTAMP
-                ''')
-                
-                deleted_count = cursor.rowcount
+                deleted_count = 0
+                for schema in _CACHE_SCHEMAS:
+                    cursor.execute(f'''
+                        DELETE FROM {schema}.cache_entries 
+                        WHERE expires_at < CURRENT_TIMESTAMP
+                    ''')
+                    deleted_count += cursor.rowcount
                 
                 if deleted_count > 0:
                     log_step("unified_cache_manager", f"Cleaned up {deleted_count} expired cache entries", "info")
@@ -151,26 +217,29 @@ class UnifiedCacheManager:
     def _cleanup_lru(self):
         """Remove least recently used entries if cache is too large"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
+                cursor.execute(_ALL_ENTRIES_VIEW)
                 
                 # Get current cache size
-                cursor.execute('SELECT COUNT(*) FROM cache_entries')
+                cursor.execute('SELECT COUNT(*) FROM all_cache_entries')
                 current_size = cursor.fetchone()[0]
                 
                 if current_size > self.max_cache_size:
-                    # Delete oldest entries
+                    # Delete oldest entries across both databases
                     excess = current_size - self.max_cache_size
                     cursor.execute('''
-                        DELETE FROM cache_entries 
-                        WHERE key IN (
-                            SELECT key FROM cache_entries 
-                            ORDER BY last_accessed ASC 
-                            LIMIT ?
-                        )
+                        SELECT db, key FROM all_cache_entries 
+                        ORDER BY last_accessed ASC 
+                        LIMIT ?
                     ''', (excess,))
+                    oldest = cursor.fetchall()
                     
-                    deleted_count = cursor.rowcount
+                    deleted_count = 0
+                    for schema in _CACHE_SCHEMAS:
+                        keys = [(key,) for db, key in oldest if db == schema]
+                        cursor.executemany(f'DELETE FROM {schema}.cache_entries WHERE key = ?', keys)
+                        deleted_count += len(keys)
                     log_step("unified_cache_manager", f"Cleaned up {deleted_count} LRU cache entries", "info")
                 
                 conn.commit()
@@ -182,19 +251,19 @@ class UnifiedCacheManager:
         """Get data from cache or Supabase"""
         with self.lock:
             cache_key = self._generate_cache_key(endpoint, params)
+            table = self._cache_table(endpoint)
             ttl = ttl or self.default_ttl
             
             # Update statistics
             self.stats['total_requests'] += 1
             
             try:
-                with sqlite3.connect(self.db_path, timeout=30) as conn:
-                    conn.execute('PRAGMA journal_mode=WAL')
+                with self._connect() as conn:
                     cursor = conn.cursor()
                     
                     # Check cache
-                    cursor.execute('''
-                        SELECT value, expires_at FROM cache_entries 
+                    cursor.execute(f'''
+                        SELECT value, expires_at FROM {table} 
                         WHERE key = ? AND expires_at > CURRENT_TIMESTAMP
                     ''', (cache_key,))
                     
@@ -204,8 +273,8 @@ class UnifiedCacheManager:
                         value, expires_at = result
                         
                         # Update access count and last accessed
-                        cursor.execute('''
-                            UPDATE cache_entries 
+                        cursor.execute(f'''
+                            UPDATE {table} 
                             SET access_count = access_count + 1, 
                                 last_accessed = CURRENT_TIMESTAMP
                             WHERE key = ?
@@ -217,8 +286,8 @@ class UnifiedCacheManager:
                         self.stats['api_calls_saved'] += 1
                         
                         log_step("unified_cache_manager", f"Cache hit for {endpoint}", "debug")
-                        return json.loads(value)
-            
+                        return _json_loads(value)
+        
             except Exception as e:
                 log_step("unified_cache_manager", f"Error reading from cache: {e}", "error")
             
@@ -242,17 +311,10 @@ class UnifiedCacheManager:
     def _fetch_from_supabase(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """Fetch data from Supabase API with graceful error handling"""
         try:
-            url = f"{self.supabase_url}/rest/v1/{endpoint}"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json'
-            }
-            
-            response = requests.get(url, headers=headers, params=params or {}, timeout=10)
+            response = self._session.get(self._base_url + endpoint, params=params or {}, timeout=10)
             
             if response.status_code == 200:
-                return response.json()
+                return _json_loads(response.content)
             else:
                 log_step("unified_cache_manager", f"Supabase API error: {response.status_code}", "error")
                 return None
@@ -267,25 +329,28 @@ class UnifiedCacheManager:
             log_step("unified_cache_manager", f"Error fetching from Supabase: {e}", "error")
             return None
     
-    def _store_in_cache(self, key: str, endpoint: str, params: Dict, data: Dict, ttl: int):
+    def _store_in_cache(self, key: bytes, endpoint: str, params: Dict, data: Dict, ttl: int):
         """Store data in cache"""
         try:
-            expires_at = datetime.now() + timedelta(seconds=ttl)
-            
-            with sqlite3.connect(self.db_path, timeout=30) as conn:
-                conn.execute('PRAGMA journal_mode=WAL')
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute('''
-                    INSERT OR REPLACE INTO cache_entries 
+                # Expiry is computed by SQLite in the same format as CURRENT_TIMESTAMP
+                cursor.execute(f'''
+                    INSERT INTO {self._cache_table(endpoint)} 
                     (key, value, endpoint, params, expires_at, access_count, last_accessed)
-                    VALUES (?, ?, ?, ?, ?, 0, CURRENT_TIMESTAMP)
+                    VALUES (?, ?, ?, ?, datetime('now', ? || ' seconds'), 0, CURRENT_TIMESTAMP)
+                    ON CONFLICT(key) DO UPDATE SET
+                        value = excluded.value,
+                        expires_at = excluded.expires_at,
+                        access_count = 0,
+                        last_accessed = CURRENT_TIMESTAMP
                 ''', (
                     key,
-                    json.dumps(data),
+                    _json_dumps(data),
                     endpoint,
-                    json.dumps(params or {}),
-                    expires_at.isoformat()
+                    _json_dumps(params or {}),
+                    str(int(ttl))
                 ))
                 
                 conn.commit()
@@ -305,28 +370,24 @@ class UnifiedCacheManager:
     def _get_cache_size(self) -> int:
         """Get current cache size"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute('SELECT COUNT(*) FROM cache_entries')
+                cursor.execute(_ALL_ENTRIES_VIEW)
+                cursor.execute('SELECT COUNT(*) FROM all_cache_entries')
                 return cursor.fetchone()[0]
         except:
             return 0
     
     def post(self, endpoint: str, data: Dict) -> Optional[Dict]:
-        """Post data to Supabase and optionally invalidate cache"""
+        """Post data to Supabase and invalidate cached reads of that endpoint"""
         try:
-            url = f"{self.supabase_url}/rest/v1/{endpoint}"
-            headers = {
-                'apikey': self.supabase_key,
-                'Authorization': f'Bearer {self.supabase_key}',
-                'Content-Type': 'application/json',
-                'Prefer': 'return=representation'
-            }
-            
-            response = requests.post(url, json=data, headers=headers, timeout=10)
+            response = self._session.post(self._base_url + endpoint, data=_json_dumps(data),
+                                          headers=self._post_headers, timeout=10)
             
             if response.status_code in [200, 201]:
-                result = response.json()
+                result = _json_loads(response.content)
+                # Cached GETs of this endpoint no longer reflect the table
+                self._invalidate_endpoint(endpoint)
                 return result
             else:
                 log_step("unified_cache_manager", f"Supabase POST error: {response.status_code}", "error")
@@ -342,27 +403,26 @@ class UnifiedCacheManager:
             log_step("unified_cache_manager", f"Error posting to Supabase: {e}", "error")
             return None
     
-    def _invalidate_cache_pattern(self, pattern: str):
-        """Invalidate cache entries matching pattern"""
+    def _invalidate_endpoint(self, endpoint: str):
+        """Invalidate cache entries for an exact endpoint (uses idx_endpoint)"""
         try:
-            with sqlite3.connect(self.db_path, timeout=5) as conn:
-                conn.execute('PRAGMA journal_mode=WAL')
+            with self._connect(timeout=5) as conn:
                 conn.execute('PRAGMA busy_timeout=5000')
                 cursor = conn.cursor()
                 
-                # Delete entries matching pattern
-                cursor.execute('DELETE FROM cache_entries WHERE endpoint LIKE ?', (f'%{pattern}%',))
+                # Delete entries for this endpoint
+                cursor.execute(f'DELETE FROM {self._cache_table(endpoint)} WHERE endpoint = ?', (endpoint,))
                 
                 invalidated_count = cursor.rowcount
                 
                 if invalidated_count > 0:
-                    log_step("unified_cache_manager", f"Invalidated {invalidated_count} cache entries for {pattern}", "info")
+                    log_step("unified_cache_manager", f"Invalidated {invalidated_count} cache entries for {endpoint}", "info")
                 
                 conn.commit()
                 
         except sqlite3.OperationalError as e:
             if "database is locked" in str(e):
-                log_step("unified_cache_manager", f"Database locked, skipping invalidation for {pattern}", "warning")
+                log_step("unified_cache_manager", f"Database locked, skipping invalidation for {endpoint}", "warning")
             else:
                 log_step("unified_cache_manager", f"Database error invalidating cache: {e}", "error")
         except Exception as e:
@@ -417,10 +477,12 @@ class UnifiedCacheManager:
     def clear_cache(self):
         """Clear all cache entries"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
-                cursor.execute('DELETE FROM cache_entries')
-                deleted_count = cursor.rowcount
+                deleted_count = 0
+                for schema in _CACHE_SCHEMAS:
+                    cursor.execute(f'DELETE FROM {schema}.cache_entries')
+                    deleted_count += cursor.rowcount
                 conn.commit()
             
             # Reset statistics
@@ -442,17 +504,18 @@ class UnifiedCacheManager:
     def optimize_cache(self):
         """Optimize cache by removing unused entries"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connect() as conn:
                 cursor = conn.cursor()
                 
                 # Remove entries with low access count and old last access
-                cursor.execute('''
-                    DELETE FROM cache_entries 
-                    WHERE access_count < 2 
-                    AND last_accessed < datetime('now', '-1 hour')
-                ''')
-                
-                optimized_count = cursor.rowcount
+                optimized_count = 0
+                for schema in _CACHE_SCHEMAS:
+                    cursor.execute(f'''
+                        DELETE FROM {schema}.cache_entries 
+                        WHERE access_count < 2 
+                        AND last_accessed < datetime('now', '-1 hour')
+                    ''')
+                    optimized_count += cursor.rowcount
                 conn.commit()
             
             log_step("unified_cache_manager", f"Optimized {optimized_count} cache entries", "info")
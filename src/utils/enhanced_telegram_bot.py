@@ -8,10 +8,20 @@ import os
 import sys
 import json
 import time
+import atexit
+import heapq
+import mmap
+import threading
+import weakref
+import zlib
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import asyncio
+import re
 import logging
-from datetime import datetime, timedelta
+from collections import Counter, deque
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
 import subprocess
@@ -23,6 +33,145 @@ sys.path.insert(0, str(project_root))
 
 from utils.utils import log_step
 
+_LOG_LEVEL_RE = re.compile(rb'\[(INFO|ERROR|WARNING)\]')
+
+# Single-pass awk program counting log lines per level (fixed-string index(), no regex)
+_AWK_LEVEL_COUNT = (
+    'index($0, "[INFO]") {i++} index($0, "[ERROR]") {e++} index($0, "[WARNING]") {w++} '
+    'END {print i+0, e+0, w+0}'
+)
+
+# Upload progress bars, indexed by number of filled slots
+_BAR_LEN = 20
+_BARS = tuple('█' * i + '░' * (_BAR_LEN - i) for i in range(_BAR_LEN + 1))
+
+# Static message templates, built once at import
+_TPL_2FA = """
+🔐 <b>iCloud 2FA Required</b>
+
+📝 <b>Pipeline Step:</b> {step}
+🆔 <b>Request ID:</b> <code>{rid}</code>
+⏰ <b>Expires in:</b> 5 minutes
+🕐 <b>Time:</b> {hms}
+
+Please reply with your 6-digit 2FA code from your phone.
+
+<i>💡 Tip: The code is usually sent to your iPhone/iPad</i>
+"""
+
+_HELP_MSG = """
+🤖 <b>Media Pipeline Bot Commands</b>
+
+<b>Available Commands:</b>
+/start - Show this help message
+/status - Get current pipeline status
+/summary - Get daily summary
+/2fa_status - Check pending 2FA requests
+/clear_2fa - Clear expired 2FA requests
+/logs - Get recent pipeline logs
+/system - Get system information
+
+<b>Automatic Notifications:</b>
+🔐 2FA requests
+📊 Pipeline status updates
+❌ Error alerts
+📤 Upload progress
+📥 Download summaries
+🗜️ Compression reports
+🔄 Syncthing status
+
+<i>💡 This bot will automatically notify you of important pipeline events!</i>
+"""
+
+_telegram_session = None
+_telegram_session_lock = threading.Lock()
+
+def get_telegram_session() -> requests.Session:
+    """Get the pooled requests session shared by all Telegram API calls in this process"""
+    global _telegram_session
+    with _telegram_session_lock:
+        if _telegram_session is None:
+            session = requests.Session()
+            # sendMessage is a POST that isn't idempotent: a read timeout or 5xx may follow a
+            # delivered message, so POSTs are only retried when the connection never opened
+            retries = Retry(
+                total=3,
+                connect=3,
+                read=0,
+                backoff_factor=0.5,
+                status_forcelist=[500, 502, 503, 504],
+                allowed_methods=["GET"]
+            )
+            session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=retries))
+            atexit.register(session.close)
+            _telegram_session = session
+    return _telegram_session
+
+# Debug messages from every bot in the process are flushed by one background thread
+_debug_bots = weakref.WeakSet()
+_debug_wakeup = threading.Event()
+_debug_flusher_lock = threading.Lock()
+_debug_flusher_started = False
+
+def _register_debug_bot(bot: "EnhancedTelegramBot"):
+    """Track a bot's debug queue, starting the process-wide flusher on first use"""
+    global _debug_flusher_started
+    with _debug_flusher_lock:
+        _debug_bots.add(bot)
+        if not _debug_flusher_started:
+            _debug_flusher_started = True
+            threading.Thread(target=_debug_flush_loop, daemon=True).start()
+            atexit.register(_flush_all_debug_messages)
+
+def _flush_all_debug_messages():
+    """Flush the queued debug messages of every live bot"""
+    for bot in list(_debug_bots):
+        try:
+            bot.flush_debug_messages()
+        except Exception as e:
+            log_step("enhanced_telegram_bot", f"Error flushing debug messages: {e}", "warning")
+
+def _debug_flush_loop():
+    """Periodically flush queued debug messages"""
+    interval = max(1.0, float(os.getenv('TELEGRAM_DEBUG_FLUSH_INTERVAL', '5')))
+    while True:
+        _debug_wakeup.wait(interval)
+        _debug_wakeup.clear()
+        _flush_all_debug_messages()
+
+# System stats for summaries, refreshed by one background thread once first needed
+_sys_stats = None
+_sys_stats_interval = 30
+_sys_stats_lock = threading.Lock()
+psutil.cpu_percent(interval=None)  # Prime the non-blocking CPU counter
+
+def _snapshot_sys_stats() -> Dict:
+    """Take a non-blocking snapshot of CPU, memory and disk usage"""
+    global _sys_stats
+    _sys_stats = {
+        'cpu': psutil.cpu_percent(interval=None),
+        'mem': psutil.virtual_memory().percent,
+        'disk': psutil.disk_usage('/').percent
+    }
+    return _sys_stats
+
+def _snap_loop():
+    """Periodically refresh the cached system stats"""
+    while True:
+        time.sleep(_sys_stats_interval)
+        try:
+            _snapshot_sys_stats()
+        except Exception as e:
+            log_step("enhanced_telegram_bot", f"Error refreshing system stats: {e}", "warning")
+
+def get_sys_stats() -> Dict:
+    """Get the cached system stats; the first call snapshots and starts the refresher"""
+    with _sys_stats_lock:
+        if _sys_stats is None:
+            _snapshot_sys_stats()
+            threading.Thread(target=_snap_loop, daemon=True).start()
+        return _sys_stats
+
 class EnhancedTelegramBot:
     def __init__(self):
         """Initialize enhanced Telegram bot"""
@@ -33,8 +182,24 @@ class EnhancedTelegramBot:
             raise ValueError("TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID must be set in environment")
         
         self.base_url = f"https://api.telegram.org/bot{self.bot_token}"
+        self._send_url = f"{self.base_url}/sendMessage"
+        self._help_payload = {'chat_id': self.chat_id, 'text': _HELP_MSG, 'parse_mode': 'HTML'}
+        
+        # Process-wide keep-alive session so messages reuse one TLS connection
+        # (429s are handled in send_message using Telegram's retry_after)
+        self.session = get_telegram_session()
+        
+        # Token bucket: 30 messages/sec globally, 1 message/sec to our chat
+        self._bucket_rate = 30.0
+        self._bucket_tokens = self._bucket_rate
+        self._bucket_ts = time.monotonic()
+        self._per_chat_last = 0.0
+        self._bucket_lock = threading.Lock()
         self.pending_2fa_requests = {}
-        self.notification_history = []
+        self._expiry_heap = []  # (monotonic expiry, request_id), soonest first
+        self.notification_history = deque(maxlen=1000)  # (epoch seconds, crc32 of message)
+        self._history_lock = threading.Lock()  # Pipeline and webhook threads share one bot
+        self._last_progress = {}  # filename -> (filled bar slots, last send monotonic time)
         
         # Debug configuration
         self.debug_messages = os.getenv('TELEGRAM_DEBUG_MESSAGES', 'false').lower() == 'true'
@@ -42,18 +207,37 @@ class EnhancedTelegramBot:
         self.pipeline_notifications = os.getenv('TELEGRAM_PIPELINE_NOTIFICATIONS', 'true').lower() == 'true'
         self.error_notifications = os.getenv('TELEGRAM_ERROR_NOTIFICATIONS', 'true').lower() == 'true'
         
+        # Debug messages are queued and flushed in batches by the shared flusher thread
+        self._debug_queue = deque(maxlen=256)
+        self._debug_lock = threading.Lock()  # One drainer at a time (flusher thread, atexit, callers)
+        self._debug_flush_size = 20  # Flush early once this many messages are queued
+        if self.debug_messages:
+            _register_debug_bot(self)
+        
         # Step tracking for summaries
         self.current_step = None
         self.step_start_time = None
+        self.step_start_mono = None
         self.step_summary = {}
         
         log_step("enhanced_telegram_bot", "Enhanced Telegram bot initialized", "info")
     
+    @staticmethod
+    def _fmt_hms(dt: datetime) -> str:
+        """Format a datetime as HH:MM:SS without going through strftime"""
+        return f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
+    
+    @staticmethod
+    def _fmt_date(dt: datetime) -> str:
+        """Format a datetime as YYYY-MM-DD without going through strftime"""
+        return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+    
     def start_step(self, step_name: str, step_description: str = ""):
         """Start tracking a pipeline step"""
         if self.step_summaries:
             self.current_step = step_name
             self.step_start_time = datetime.now()
+            self.step_start_mono = time.monotonic()
             self.step_summary = {
                 'name': step_name,
                 'description': step_description,
@@ -69,9 +253,9 @@ class EnhancedTelegramBot:
 
 📝 <b>Step:</b> {step_name}
 📄 <b>Description:</b> {step_description or 'No description'}
-🕐 <b>Started:</b> {self.step_start_time.strftime('%H:%M:%S')}
+🕐 <b>Started:</b> {self._fmt_hms(self.step_start_time)}
                 """
-                self.send_message(message)
+                self.send_message(message, dedupe=True)
     
     def update_step_progress(self, files_processed: int = 0, error: str = None, warning: str = None):
         """Update step progress"""
@@ -86,7 +270,7 @@ class EnhancedTelegramBot:
     def complete_step(self, success: bool = True, additional_info: str = ""):
         """Complete current step and send summary"""
         if self.step_summaries and self.current_step:
-            duration = datetime.now() - self.step_start_time if self.step_start_time else timedelta(0)
+            duration_s = time.monotonic() - self.step_start_mono if self.step_start_mono else 0.0
             
             status_emoji = "✅" if success else "❌"
             status_text = "Completed" if success else "Failed"
@@ -95,7 +279,7 @@ class EnhancedTelegramBot:
 {status_emoji} <b>Pipeline Step {status_text}</b>
 
 📝 <b>Step:</b> {self.current_step}
-⏱️ <b>Duration:</b> {duration.total_seconds():.1f}s
+⏱️ <b>Duration:</b> {duration_s:.1f}s
 📊 <b>Files Processed:</b> {self.step_summary['files_processed']}
             """
             
@@ -110,79 +294,152 @@ class EnhancedTelegramBot:
             if additional_info:
                 message += f"\n📋 <b>Info:</b> {additional_info}"
             
-            self.send_message(message)
+            self.send_message(message, dedupe=True)
             
             # Reset step tracking
             self.current_step = None
             self.step_start_time = None
+            self.step_start_mono = None
             self.step_summary = {}
     
     def send_debug_message(self, message: str, level: str = "info"):
-        """Send debug message if debug mode is enabled"""
+        """Queue debug message for the next batched flush if debug mode is enabled"""
         if self.debug_messages:
-            level_emoji = {
-                'info': 'ℹ️',
-                'warning': '⚠️',
-                'error': '❌',
-                'success': '✅'
-            }
+            self._debug_queue.append((level, message, datetime.now()))
+            if len(self._debug_queue) >= self._debug_flush_size:
+                _debug_wakeup.set()
+    
+    def flush_debug_messages(self):
+        """Send queued debug messages, packing as many as fit into each Telegram message"""
+        level_emoji = {
+            'info': 'ℹ️',
+            'warning': '⚠️',
+            'error': '❌',
+            'success': '✅'
+        }
+        header = "🐞 <b>Debug Messages</b>\n\n"
+        separator = "\n───\n"
+        max_length = 4096
+        
+        while True:
+            entries = []
+            length = len(header)
+            with self._debug_lock:
+                while self._debug_queue:
+                    level, message, timestamp = self._debug_queue[0]
+                    message = message[:max_length - len(header) - 64]  # Leave room for the time line
+                    entry = f"{level_emoji.get(level, 'ℹ️')} {message}\n🕐 <b>Time:</b> {self._fmt_hms(timestamp)}"
+                    added = len(entry) + (len(separator) if entries else 0)
+                    if entries and length + added > max_length:
+                        break
+                    self._debug_queue.popleft()
+                    entries.append(entry)
+                    length += added
+            if not entries:
+                break
             
-            formatted_message = f"""
-{level_emoji.get(level, 'ℹ️')} <b>Debug Message</b>
-
-{message}
-
-🕐 <b>Time:</b> {datetime.now().strftime('%H:%M:%S')}
-            """
-            self.send_message(formatted_message)
+            self.send_message(header + separator.join(entries), dedupe=True)
     
-    def send_message(self, message: str, parse_mode: str = "HTML") -> bool:
-        """Send message to Telegram with retry logic"""
+    def _acquire(self):
+        """Block until the global and per-chat rate limits allow another message"""
+        with self._bucket_lock:
+            while True:
+                now = time.monotonic()
+                self._bucket_tokens = min(self._bucket_rate,
+                                          self._bucket_tokens + (now - self._bucket_ts) * self._bucket_rate)
+                self._bucket_ts = now
+                
+                wait = max((1.0 - self._bucket_tokens) / self._bucket_rate,
+                           self._per_chat_last + 1.0 - now)
+                if wait <= 0:
+                    break
+                time.sleep(wait)
+            
+            self._bucket_tokens -= 1.0
+            self._per_chat_last = now
+    
+    def _post_message(self, data: Dict) -> requests.Response:
+        """POST a sendMessage payload, honouring Telegram's retry_after once on 429"""
+        self._acquire()
+        response = self.session.post(self._send_url, data=data, timeout=(3.05, 10))
+        
+        if response.status_code == 429:
+            try:
+                retry_after = response.json().get('parameters', {}).get('retry_after', 1)
+            except ValueError:
+                retry_after = 1
+            log_step("enhanced_telegram_bot", f"Rate limited by Telegram, retrying in {retry_after}s", "warning")
+            time.sleep(retry_after)
+            self._acquire()
+            response = self.session.post(self._send_url, data=data, timeout=(3.05, 10))
+        
+        return response
+    
+    def send_message(self, message: str, parse_mode: str = "HTML", dedupe: bool = False) -> bool:
+        """Send message to Telegram with retry logic (with dedupe, identical messages within 60s are skipped)"""
+        entry = None
         try:
-            url = f"{self.base_url}/sendMessage"
+            if dedupe:
+                now = int(time.time())
+                digest = zlib.crc32(message.encode('utf-8'))
+                with self._history_lock:
+                    if any(now - ts < 60 and h == digest for ts, h in self.notification_history):
+                        log_step("enhanced_telegram_bot", f"Skipping duplicate message: {message[:50]}...", "debug")
+                        return True
+                    # Claim the slot up front so a concurrent identical send is skipped
+                    entry = (now, digest)
+                    self.notification_history.append(entry)
+            
             data = {
                 'chat_id': self.chat_id,
                 'text': message,
                 'parse_mode': parse_mode
             }
             
-            response = requests.post(url, data=data, timeout=10)
+            response = self._post_message(data)
             success = response.status_code == 200
             
             if success:
                 log_step("enhanced_telegram_bot", f"Message sent: {message[:50]}...", "info")
             else:
+                self._forget(entry)
                 log_step("enhanced_telegram_bot", f"Failed to send message: {response.text}", "error")
             
             return success
             
         except Exception as e:
+            self._forget(entry)
             log_step("enhanced_telegram_bot", f"Error sending message: {e}", "error")
             return False
     
+    def _forget(self, entry):
+        """Drop a history entry for a send that failed, so it can be retried"""
+        if entry is None:
+            return
+        with self._history_lock:
+            try:
+                self.notification_history.remove(entry)
+            except ValueError:
+                pass
+    
     def send_2fa_request(self, pipeline_step: str, request_id: str = None) -> str:
         """Send 2FA request notification"""
+        now = datetime.now()
         if not request_id:
             request_id = f"2fa_{int(time.time())}"
         
+        mono = time.monotonic()
+        expires = mono + 300  # 5 minutes
         self.pending_2fa_requests[request_id] = {
             'step': pipeline_step,
-            'timestamp': datetime.now(),
+            'timestamp': now,
+            'mono': mono,
+            'expires': expires,
             'status': 'pending'
         }
+        heapq.heappush(self._expiry_heap, (expires, request_id))
         
-        message = f"""
-🔐 <b>iCloud 2FA Required</b>
-
-📝 <b>Pipeline Step:</b> {pipeline_step}
-🆔 <b>Request ID:</b> <code>{request_id}</code>
-⏰ <b>Expires in:</b> 5 minutes
-🕐 <b>Time:</b> {datetime.now().strftime('%H:%M:%S')}
-
-Please reply with your 6-digit 2FA code from your phone.
-
-<i>💡 Tip: The code is usually sent to your iPhone/iPad</i>
-        """
+        message = _TPL_2FA.format_map({'step': pipeline_step, 'rid': request_id, 'hms': self._fmt_hms(now)})
         
         if self.send_message(message):
             log_step("enhanced_telegram_bot", f"2FA request sent for {pipeline_step}", "info")
@@ -192,6 +449,7 @@ Please reply with your 6-digit 2FA code from your phone.
     
     def send_pipeline_status(self, status: str, details: str = "") -> bool:
         """Send pipeline status update"""
+        now = datetime.now()
         status_emoji = {
             'started': '🚀',
             'running': '⚙️',
@@ -207,21 +465,22 @@ Please reply with your 6-digit 2FA code from your phone.
 {emoji} <b>Pipeline Status Update</b>
 
 📊 <b>Status:</b> {status.title()}
-🕐 <b>Time:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+🕐 <b>Time:</b> {self._fmt_date(now)} {self._fmt_hms(now)}
 
 {details if details else 'No additional details available.'}
         """
         
-        return self.send_message(message)
+        return self.send_message(message, dedupe=True)
     
     def send_error_alert(self, error_type: str, error_message: str, step: str = "") -> bool:
         """Send error alert"""
+        now = datetime.now()
         message = f"""
 🚨 <b>Pipeline Error Alert</b>
 
 ❌ <b>Error Type:</b> {error_type}
 📝 <b>Step:</b> {step if step else 'Unknown'}
-🕐 <b>Time:</b> {datetime.now().strftime('%H:%M:%S')}
+🕐 <b>Time:</b> {self._fmt_hms(now)}
 
 <b>Error Details:</b>
 <code>{error_message}</code>
@@ -229,39 +488,33 @@ Please reply with your 6-digit 2FA code from your phone.
 <i>⚠️ Please check the pipeline logs for more details</i>
         """
         
-        return self.send_message(message)
+        return self.send_message(message, dedupe=True)
     
     def send_daily_summary(self) -> bool:
         """Send daily pipeline summary"""
         try:
-            # Get system stats
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
+            now = datetime.now()
+            
+            # Get system stats (cached; the first summary snapshots and starts the refresher)
+            stats = get_sys_stats()
             
             # Get pipeline stats from logs
             log_file = Path('/opt/media-pipeline/logs/pipeline.log')
             if log_file.exists():
-                with open(log_file, 'r') as f:
-                    log_content = f.read()
-                
-                # Count different log types
-                info_count = log_content.count('[INFO]')
-                error_count = log_content.count('[ERROR]')
-                warning_count = log_content.count('[WARNING]')
+                info_count, error_count, warning_count = self._count_log_levels(log_file)
             else:
                 info_count = error_count = warning_count = 0
             
             message = f"""
 📊 <b>Daily Pipeline Summary</b>
 
-📅 <b>Date:</b> {datetime.now().strftime('%Y-%m-%d')}
-🕐 <b>Generated:</b> {datetime.now().strftime('%H:%M:%S')}
+📅 <b>Date:</b> {self._fmt_date(now)}
+🕐 <b>Generated:</b> {self._fmt_hms(now)}
 
 <b>System Status:</b>
-💻 CPU Usage: {cpu_percent}%
-🧠 Memory: {memory.percent}% used
-💾 Disk: {disk.percent}% used
+💻 CPU Usage: {stats['cpu']}%
+🧠 Memory: {stats['mem']}% used
+💾 Disk: {stats['disk']}% used
 
 <b>Pipeline Activity:</b>
 ✅ Info Messages: {info_count}
@@ -277,14 +530,54 @@ Please reply with your 6-digit 2FA code from your phone.
             log_step("enhanced_telegram_bot", f"Error generating daily summary: {e}", "error")
             return False
     
+    @classmethod
+    def _count_log_levels(cls, log_file: Path) -> tuple:
+        """Count [INFO]/[ERROR]/[WARNING] lines across the whole log file with one awk pass"""
+        try:
+            result = subprocess.run(['awk', _AWK_LEVEL_COUNT, str(log_file)],
+                                    capture_output=True, text=True, timeout=60)
+            if result.returncode == 0:
+                info_count, error_count, warning_count = map(int, result.stdout.split())
+                return info_count, error_count, warning_count
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+        
+        # No usable awk: fall back to scanning the tail in-process
+        return cls._count_log_levels_tail(log_file)
+    
+    @staticmethod
+    def _count_log_levels_tail(log_file: Path, tail_bytes: int = 16 * 1024 * 1024) -> tuple:
+        """Count [INFO]/[ERROR]/[WARNING] entries in the last tail_bytes of a log file"""
+        with open(log_file, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            start = max(0, size - tail_bytes)
+            start -= start % mmap.ALLOCATIONGRANULARITY  # mmap offsets must be page aligned
+            if size == start:
+                return 0, 0, 0
+            
+            with mmap.mmap(f.fileno(), length=size - start, offset=start, access=mmap.ACCESS_READ) as mm:
+                # One pass over the page cache; no Python copy of the log
+                counts = Counter(_LOG_LEVEL_RE.findall(mm))
+        
+        return counts[b'INFO'], counts[b'ERROR'], counts[b'WARNING']
+    
     def send_file_upload_progress(self, filename: str, progress: int, total: int) -> bool:
-        """Send file upload progress"""
-        percentage = (progress / total) * 100 if total > 0 else 0
+        """Send file upload progress (only when the bar changes, or every 5s otherwise)"""
+        percentage = (progress * 100) / total if total > 0 else 0
+        filled_length = 0 if total <= 0 else max(0, min(_BAR_LEN, (progress * _BAR_LEN) // total))
+        
+        now = time.monotonic()
+        finished = total > 0 and progress >= total
+        last_filled, last_sent = self._last_progress.get(filename, (None, 0.0))
+        if not finished and filled_length == last_filled and now - last_sent < 5.0:
+            return True  # Nothing visibly changed since the last update
+        
+        if finished:
+            self._last_progress.pop(filename, None)
+        else:
+            self._last_progress[filename] = (filled_length, now)
         
-        # Create progress bar
-        bar_length = 20
-        filled_length = int(bar_length * progress // total) if total > 0 else 0
-        bar = '█' * filled_length + '░' * (bar_length - filled_length)
+        bar = _BARS[filled_length]
         
         message = f"""
 📤 <b>Upload Progress</b>
@@ -295,39 +588,42 @@ Please reply with your 6-digit 2FA code from your phone.
 {bar} {percentage:.1f}%
         """
         
-        return self.send_message(message)
+        return self.send_message(message, dedupe=True)
     
     def send_download_summary(self, files_downloaded: int, total_size: str) -> bool:
         """Send download summary"""
+        now = datetime.now()
         message = f"""
 📥 <b>Download Complete</b>
 
 📁 <b>Files Downloaded:</b> {files_downloaded}
 💾 <b>Total Size:</b> {total_size}
-🕐 <b>Completed:</b> {datetime.now().strftime('%H:%M:%S')}
+🕐 <b>Completed:</b> {self._fmt_hms(now)}
 
 <i>✅ All files have been successfully downloaded from iCloud</i>
         """
         
-        return self.send_message(message)
+        return self.send_message(message, dedupe=True)
     
     def send_compression_summary(self, original_size: str, compressed_size: str, savings_percent: float) -> bool:
         """Send compression summary"""
+        now = datetime.now()
         message = f"""
 🗜️ <b>Compression Complete</b>
 
 📊 <b>Original Size:</b> {original_size}
 📦 <b>Compressed Size:</b> {compressed_size}
 💰 <b>Space Saved:</b> {savings_percent:.1f}%
-🕐 <b>Completed:</b> {datetime.now().strftime('%H:%M:%S')}
+🕐 <b>Completed:</b> {self._fmt_hms(now)}
 
 <i>🎉 Great space savings achieved!</i>
         """
         
-        return self.send_message(message)
+        return self.send_message(message, dedupe=True)
     
     def send_syncthing_status(self, status: str) -> bool:
         """Send Syncthing status update"""
+        now = datetime.now()
         status_emoji = {
             'connected': '🔗',
             'disconnected': '🔌',
@@ -342,7 +638,7 @@ Please reply with your 6-digit 2FA code from your phone.
 🔄 <b>Syncthing Status</b>
 
 {emoji} <b>Status:</b> {status.title()}
-🕐 <b>Time:</b> {datetime.now().strftime('%H:%M:%S')}
+🕐 <b>Time:</b> {self._fmt_hms(now)}
 
 <i>Syncthing synchronization status updated</i>
         """
@@ -356,10 +652,13 @@ Please reply with your 6-digit 2FA code from your phone.
     def clear_expired_2fa_requests(self) -> int:
         """Clear expired 2FA requests (older than 5 minutes)"""
         expired_count = 0
-        current_time = datetime.now()
+        now = time.monotonic()
         
-        for request_id, request_data in list(self.pending_2fa_requests.items()):
-            if (current_time - request_data['timestamp']).seconds > 300:  # 5 minutes
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, request_id = heapq.heappop(self._expiry_heap)
+            request_data = self.pending_2fa_requests.get(request_id)
+            # Skip requests already answered or re-issued under the same ID since
+            if request_data is not None and request_data['expires'] <= now:
                 del self.pending_2fa_requests[request_id]
                 expired_count += 1
         
@@ -369,32 +668,12 @@ Please reply with your 6-digit 2FA code from your phone.
         return expired_count
     
     def send_help_message(self) -> bool:
-        """Send help message with available commands"""
-        message = f"""
-🤖 <b>Media Pipeline Bot Commands</b>
-
-<b>Available Commands:</b>
-/start - Show this help message
-/status - Get current pipeline status
-/summary - Get daily summary
-/2fa_status - Check pending 2FA requests
-/clear_2fa - Clear expired 2FA requests
-/logs - Get recent pipeline logs
-/system - Get system information
-
-<b>Automatic Notifications:</b>
-🔐 2FA requests
-📊 Pipeline status updates
-❌ Error alerts
-📤 Upload progress
-📥 Download summaries
-🗜️ Compression reports
-🔄 Syncthing status
-
-<i>💡 This bot will automatically notify you of important pipeline events!</i>
-        """
-        
-        return self.send_message(message)
+        """Send help message with available commands (prebuilt payload, no duplicate check)"""
+        try:
+            return self._post_message(self._help_payload).status_code == 200
+        except Exception as e:
+            log_step("enhanced_telegram_bot", f"Error sending help message: {e}", "error")
+            return False
 
 def main():
     """Main function for testing"""
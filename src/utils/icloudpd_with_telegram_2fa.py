@@ -14,6 +14,11 @@ import re
 from pathlib import Path
 from typing import Optional
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
@@ -21,6 +26,22 @@ sys.path.insert(0, str(project_root))
 from utils.utils import log_step
 from intelligent_2fa_handler import Intelligent2FAHandler
 
+# Single case-insensitive pass over each raw (undecoded) icloudpd output line
+_TWO_FA_RE = re.compile(
+    rb"two-factor authentication|2fa|authentication code|enter two-factor|please enter.*code",
+    re.IGNORECASE
+)
+
+# With pyahocorasick installed, all prompt phrases are matched in one automaton pass;
+# "please enter" only counts when "code" follows it (as in the regex above)
+_TWO_FA_AUTOMATON = None
+if ahocorasick is not None:
+    _TWO_FA_AUTOMATON = ahocorasick.Automaton()
+    for _needle in ("two-factor authentication", "2fa", "authentication code",
+                    "enter two-factor", "please enter"):
+        _TWO_FA_AUTOMATON.add_word(_needle, _needle)
+    _TWO_FA_AUTOMATON.make_automaton()
+
 class iCloudPDWith2FA:
     def __init__(self):
         """Initialize iCloudPD with 2FA handler"""
@@ -29,6 +50,10 @@ class iCloudPDWith2FA:
         self.process = None
         self.code_provided = False
         
+        # Only the first 2FA prompt per icloudpd run asks Telegram for a code
+        self._twofa_lock = threading.Lock()
+        self._twofa_event = threading.Event()
+        
         log_step("icloudpd_2fa", "iCloudPD with Telegram 2FA initialized", "info")
     
     def run_icloudpd(self, args: list) -> int:
@@ -39,31 +64,38 @@ class iCloudPDWith2FA:
             
             log_step("icloudpd_2fa", f"Running icloudpd: {' '.join(cmd[:4])}...", "info")
             
+            self._twofa_event.clear()
+            
             # Start process
             self.process = subprocess.Popen(
                 cmd,
                 stdin=subprocess.PIPE,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                text=True,
-                bufsize=1
+                bufsize=0  # Raw byte pipes; output is split and scanned in _monitor_output
             )
             
-            # Start threads for monitoring
-            stdout_thread = threading.Thread(target=self._monitor_stdout)
-            stderr_thread = threading.Thread(target=self._monitor_stderr)
+            # Start threads for monitoring: one reader per pipe, so a full pipe never
+            # waits on a reader that is blocked on the other one
+            output_threads = [
+                threading.Thread(target=self._monitor_output, args=(pipe, sink))
+                for pipe, sink in ((self.process.stdout, sys.stdout), (self.process.stderr, sys.stderr))
+            ]
             input_thread = threading.Thread(target=self._monitor_input)
             
-            stdout_thread.start()
-            stderr_thread.start()
+            for output_thread in output_threads:
+                output_thread.start()
             input_thread.start()
             
             # Wait for process to complete
             return_code = self.process.wait()
             
+            # Unblock the input thread immediately
+            self.input_queue.put(None)
+            
             # Wait for threads to finish
-            stdout_thread.join(timeout=5)
-            stderr_thread.join(timeout=5)
+            for output_thread in output_threads:
+                output_thread.join(timeout=5)
             input_thread.join(timeout=5)
             
             log_step("icloudpd_2fa", f"iCloudPD completed with return code: {return_code}", "info")
@@ -73,79 +105,96 @@ class iCloudPDWith2FA:
             log_step("icloudpd_2fa", f"Error running icloudpd: {e}", "error")
             return 1
     
-    def _monitor_stdout(self):
-        """Monitor stdout for 2FA prompts"""
+    def _monitor_output(self, pipe, sink):
+        """Echo one icloudpd output pipe and watch it for 2FA prompts"""
         try:
-            for line in iter(self.process.stdout.readline, ''):
-                if line:
-                    print(line.strip())
-                    
-                    # Check for 2FA prompt
-                    if self._is_2fa_prompt(line):
-                        self._handle_2fa_prompt()
+            fd = pipe.fileno()
+            pending = b''
+            # os.read returns as soon as any output is available, not a full line
+            for chunk in iter(lambda: os.read(fd, 65536), b''):
+                *lines, pending = (pending + chunk).split(b'\n')
+                
+                # Prompts are printed without a newline; don't wait for one
+                if pending and self._is_2fa_prompt(pending):
+                    lines.append(pending)
+                    pending = b''
+                
+                for line in lines:
+                    if line:
+                        self._process_line(line, sink)
+            
+            # EOF: flush any trailing partial line
+            if pending:
+                self._process_line(pending, sink)
                         
         except Exception as e:
-            log_step("icloudpd_2fa", f"Error monitoring stdout: {e}", "error")
+            log_step("icloudpd_2fa", f"Error monitoring output: {e}", "error")
     
-    def _monitor_stderr(self):
-        """Monitor stderr for errors and 2FA prompts"""
-        try:
-            for line in iter(self.process.stderr.readline, ''):
-                if line:
-                    print(line.strip(), file=sys.stderr)
-                    
-                    # Check for 2FA prompt in stderr
-                    if self._is_2fa_prompt(line):
-                        self._handle_2fa_prompt()
-                        
-        except Exception as e:
-            log_step("icloudpd_2fa", f"Error monitoring stderr: {e}", "error")
+    def _process_line(self, line: bytes, sink):
+        """Echo an icloudpd output line and react to 2FA prompts"""
+        print(line.decode('utf-8', 'replace').strip(), file=sink)
+        
+        # Check for 2FA prompt
+        if self._is_2fa_prompt(line):
+            self._handle_2fa_prompt()
     
     def _monitor_input(self):
         """Monitor for input requests and provide 2FA codes"""
         try:
             while self.process and self.process.poll() is None:
-                if not self.input_queue.empty():
-                    input_data = self.input_queue.get()
-                    if input_data:
-                        self.process.stdin.write(input_data + '\n')
-                        self.process.stdin.flush()
-                        log_step("icloudpd_2fa", f"Provided input: {input_data}", "info")
+                try:
+                    input_data = self.input_queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                
+                if input_data is None:
+                    break  # Sentinel: process finished
                 
-                time.sleep(0.1)
+                self.process.stdin.write((input_data + '\n').encode('utf-8'))
+                self.process.stdin.flush()
+                log_step("icloudpd_2fa", f"Provided input: {input_data}", "info")
                 
         except Exception as e:
             log_step("icloudpd_2fa", f"Error monitoring input: {e}", "error")
     
-    def _is_2fa_prompt(self, line: str) -> bool:
+    def _is_2fa_prompt(self, line: bytes) -> bool:
         """Check if line contains 2FA prompt"""
-        line_lower = line.lower()
-        return (
-            'two-factor authentication' in line_lower or
-            '2fa' in line_lower or
-            'authentication code' in line_lower or
-            'enter two-factor' in line_lower or
-            'please enter' in line_lower and 'code' in line_lower
-        )
+        if _TWO_FA_AUTOMATON is None:
+            return _TWO_FA_RE.search(line) is not None
+        
+        text = line.decode('latin-1').lower()  # Byte-for-byte; the needles are ASCII
+        for end, needle in _TWO_FA_AUTOMATON.iter(text):
+            if needle != "please enter" or "code" in text[end + 1:]:
+                return True
+        return False
     
     def _handle_2fa_prompt(self):
         """Handle 2FA prompt by requesting code from Telegram"""
-        if self.code_provided:
-            return  # Already handled this prompt
-            
-        log_step("icloudpd_2fa", "2FA prompt detected, requesting code from Telegram", "info")
-        
-        # Request 2FA code
-        code = self.handler.wait_for_2fa_code("iCloud Download", 5)
+        # Follow-up prompt lines in the same run, or a concurrent detection, are no-ops
+        if self._twofa_event.is_set() or not self._twofa_lock.acquire(blocking=False):
+            return
         
-        if code:
-            log_step("icloudpd_2fa", f"2FA code received: {code}", "info")
-            self.input_queue.put(code)
-            self.code_provided = True
-        else:
-            log_step("icloudpd_2fa", "No 2FA code received, icloudpd will fail", "error")
-            # Send empty input to continue
-            self.input_queue.put("")
+        try:
+            if self.code_provided:
+                return  # Already handled this prompt
+            
+            log_step("icloudpd_2fa", "2FA prompt detected, requesting code from Telegram", "info")
+            
+            # Request 2FA code
+            code = self.handler.wait_for_2fa_code("iCloud Download", 5)
+            
+            if code:
+                log_step("icloudpd_2fa", f"2FA code received: {code}", "info")
+                self.input_queue.put(code)
+                self.code_provided = True
+            else:
+                log_step("icloudpd_2fa", "No 2FA code received, icloudpd will fail", "error")
+                # Send empty input to continue
+                self.input_queue.put("")
+            
+            self._twofa_event.set()
+        finally:
+            self._twofa_lock.release()
 
 def main():
     """Main function"""
@@ -5,6 +5,7 @@ Integration script to add intelligent 2FA handling to existing pipeline steps
 
 import os
 import sys
+import json
 import subprocess
 import time
 from pathlib import Path
@@ -16,92 +17,6 @@ sys.path.insert(0, str(project_root))
 from utils.utils import log_step
 from intelligent_2fa_handler import Intelligent2FAHandler
 
-def patch_icloudpd_for_2fa():
-    """Patch icloudpd to use intelligent 2FA handler"""
-    try:
-        # Find icloudpd installation
-        result = subprocess.run(['which', 'icloudpd'], capture_output=True, text=True)
-        if result.returncode != 0:
-            log_step("integrate_2fa", "icloudpd not found in PATH", "error")
-            return False
-        
-        icloudpd_path = result.stdout.strip()
-        log_step("integrate_2fa", f"Found icloudpd at: {icloudpd_path}", "info")
-        
-        # Create a wrapper script for icloudpd with 2FA support
-        wrapper_script = f"""#!/usr/bin/env python3
-import sys
-import os
-import subprocess
-from pathlib import Path
-
-# Add project root to path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
-
-from intelligent_2fa_handler import Intelligent2FAHandler
-
-def main():
-    # Initialize 2FA handler
-    handler = Intelligent2FAHandler()
-    
-    # Get 2FA code if needed
-    print("🔐 Checking for 2FA requirement...")
-    
-    # Run original icloudpd command
-    original_args = sys.argv[1:]
-    cmd = ['{icloudpd_path}'] + original_args
-    
-    # Add 2FA handling
-    cmd.extend(['--trusted-device', '--no-progress-bar'])
-    
-    try:
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        # Check if 2FA is required
-        if 'Two-factor authentication is required' in result.stderr:
-            print("🔐 2FA required, requesting code via Telegram...")
-            code = handler.wait_for_2fa_code("iCloud Download", 5)
-            
-            if code:
-                print(f"✅ 2FA code received: {code}")
-                # Retry with 2FA code
-                cmd.extend(['--password', os.getenv('ICLOUD_PASSWORD')])
-                result = subprocess.run(cmd, capture_output=True, text=True)
-            else:
-                print("❌ No 2FA code received")
-                return 1
-        
-        # Print output
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(result.stderr, file=sys.stderr)
-        
-        return result.returncode
-        
-    except Exception as e:
-        print(f"Error running icloudpd: {{e}}", file=sys.stderr)
-        return 1
-
-if __name__ == "__main__":
-    sys.exit(main())
-"""
-        
-        wrapper_path = project_root / "scripts" / "icloudpd_with_2fa.py"
-        with open(wrapper_path, 'w') as f:
-            f.write(wrapper_script)
-        
-        # Make executable
-        os.chmod(wrapper_path, 0o755)
-        
-        log_step("integrate_2fa", f"Created icloudpd wrapper: {wrapper_path}", "info")
-        return True
-        
-    except Exception as e:
-        log_step("integrate_2fa", f"Error patching icloudpd: {e}", "error")
-        return False
-
 def patch_upload_script():
     """Update upload_icloud.js to use intelligent 2FA handler"""
     try:
@@ -196,10 +111,10 @@ def setup_supabase_tables():
             log_step("integrate_2fa", "Supabase credentials not found", "warning")
             return False
         
-        # Read SQL file
+        # Read SQL file and encode the RPC body once (all statements go in one request)
         sql_file = project_root / "scripts" / "setup_telegram_tables.sql"
         with open(sql_file, 'r') as f:
-            sql_content = f.read()
+            body = json.dumps({'sql': f.read()}).encode('utf-8')
         
         # Execute SQL via Supabase REST API
         import requests
@@ -211,8 +126,7 @@ def setup_supabase_tables():
             'Content-Type': 'application/json'
         }
         
-        data = {'sql': sql_content}
-        response = requests.post(url, json=data, headers=headers, timeout=30)
+        response = requests.post(url, data=body, headers=headers, timeout=30)
         
         if response.status_code in [200, 201]:
             log_step("integrate_2fa", "Supabase tables created successfully", "info")
@@ -230,21 +144,18 @@ def main():
     log_step("integrate_2fa", "Starting 2FA integration", "info")
     
     success_count = 0
-    total_steps = 4
+    total_steps = 3
     
     # Step 1: Setup Supabase tables
     if setup_supabase_tables():
         success_count += 1
     
-    # Step 2: Patch icloudpd
-    if patch_icloudpd_for_2fa():
-        success_count += 1
-    
-    # Step 3: Patch upload script
+    # Step 2: Patch upload script
+    # (icloudpd needs no patching: run it in-process via iCloudPDWith2FA().run_icloudpd(args))
     if patch_upload_script():
         success_count += 1
     
-    # Step 4: Create Telegram service
+    # Step 3: Create Telegram service
     if create_2fa_service():
         success_count += 1
     
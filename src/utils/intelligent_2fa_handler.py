@@ -11,6 +11,8 @@ import time
 import requests
 import asyncio
 import logging
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict
@@ -21,15 +23,22 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from utils.utils import log_step
-from enhanced_telegram_bot import EnhancedTelegramBot
+from utils.telegram_notifier import get_telegram_bot
 from core.local_db_manager import get_db_manager
 
 class Intelligent2FAHandler:
     def __init__(self):
         """Initialize intelligent 2FA handler"""
-        self.bot = EnhancedTelegramBot()
+        self.bot = get_telegram_bot()
+        if self.bot is None:
+            raise ValueError("Telegram bot could not be initialized; check TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
         self.db_manager = get_db_manager()
-        self.active_requests = {}
+        # Pending requests in creation order, so the newest one is always at the end
+        self.active_requests: OrderedDict = OrderedDict()
+        
+        # In-process hand-off: submit_2fa_code sets the event so the waiter wakes at once
+        self._events: Dict[str, threading.Event] = {}
+        self._codes: Dict[str, str] = {}
         
         log_step("intelligent_2fa_handler", "Intelligent 2FA handler initialized", "info")
     
@@ -40,6 +49,12 @@ class Intelligent2FAHandler:
         # Create request in local database
         try:
             self.db_manager.create_2fa_request(request_id, pipeline_step, timeout_minutes)
+            timeout_seconds = timeout_minutes * 60
+            self.active_requests[request_id] = {
+                'pipeline_step': pipeline_step,
+                'expires_at_mono': time.monotonic() + timeout_seconds,
+                'expires_at': datetime.now() + timedelta(seconds=timeout_seconds)
+            }
             log_step("intelligent_2fa_handler", f"Created 2FA request: {request_id}", "info")
         except Exception as e:
             log_step("intelligent_2fa_handler", f"Error creating request: {e}", "error")
@@ -72,39 +87,47 @@ class Intelligent2FAHandler:
             log_step("intelligent_2fa_handler", "Failed to create 2FA request", "error")
             return None
         
+        # Register the waiter before anyone can be prompted for the code
+        event = self._events[request_id] = threading.Event()
+        
         # Send Telegram notification
         if not self.bot.send_2fa_request(pipeline_step, request_id):
             log_step("intelligent_2fa_handler", "Failed to send Telegram notification", "error")
+            self._cleanup_request(request_id)
             return None
         
         log_step("intelligent_2fa_handler", f"Waiting for 2FA code for {pipeline_step}", "info")
         
-        # Wait for code with intelligent polling
-        start_time = time.time()
-        timeout_seconds = timeout_minutes * 60
+        # Wait for the code: codes submitted through this handler arrive via the event
+        # immediately; codes from another process (the polling service) only reach the
+        # database, so it is still checked between waits
+        deadline = time.monotonic() + timeout_minutes * 60
         
-        while time.time() - start_time < timeout_seconds:
+        while (remaining := deadline - time.monotonic()) > 0:
+            if event.wait(min(2, remaining)):
+                code = self._codes.pop(request_id)
+                self._events.pop(request_id, None)
+                log_step("intelligent_2fa_handler", f"2FA code received: {code}", "info")
+                return code
+            
             # Check local database for request status
             try:
                 request_data = self.db_manager.get_2fa_request(request_id)
                 if request_data:
                     if request_data['status'] == 'completed' and request_data['code']:
+                        self._events.pop(request_id, None)
+                        self.active_requests.pop(request_id, None)
                         log_step("intelligent_2fa_handler", f"2FA code received: {request_data['code']}", "info")
                         return request_data['code']
                     
-                    # Check if expired
-                    expires_at = datetime.fromisoformat(request_data['expires_at'])
-                    if datetime.now() > expires_at:
-                        log_step("intelligent_2fa_handler", "2FA request expired", "warning")
-                        break
+                    # Expiry is covered by the monotonic deadline: the request was created
+                    # with the same timeout just before the wait started
                 else:
                     log_step("intelligent_2fa_handler", f"Request {request_id} not found in database", "error")
                     break
                     
             except Exception as e:
                 log_step("intelligent_2fa_handler", f"Error checking request status: {e}", "error")
-            
-            time.sleep(2)  # Check every 2 seconds
         
         # Timeout
         log_step("intelligent_2fa_handler", "2FA timeout - no code received", "error")
@@ -126,6 +149,11 @@ class Intelligent2FAHandler:
             success = self.db_manager.update_2fa_request(request_id, 'completed', code)
             
             if success:
+                self.active_requests.pop(request_id, None)
+                event = self._events.get(request_id)
+                if event is not None:  # A wait_for_2fa_code in this process is waiting for it
+                    self._codes[request_id] = code
+                    event.set()
                 log_step("intelligent_2fa_handler", f"2FA code submitted: {code}", "info")
                 return True
             else:
@@ -140,6 +168,8 @@ class Intelligent2FAHandler:
         """Clean up expired request"""
         if request_id in self.active_requests:
             del self.active_requests[request_id]
+        self._events.pop(request_id, None)
+        self._codes.pop(request_id, None)
         
         # Mark as expired locally
         log_step("intelligent_2fa_handler", f"Cleaned up request: {request_id}", "debug")
@@ -154,14 +184,34 @@ class Intelligent2FAHandler:
             log_step("intelligent_2fa_handler", f"Error getting active requests: {e}", "error")
             return {}
     
+    def latest_pending_id(self) -> Optional[str]:
+        """Get the id of the newest pending request created by this handler"""
+        request_id = next(reversed(self.active_requests), None)
+        if request_id is not None and time.monotonic() > self.active_requests[request_id]['expires_at_mono']:
+            return None
+        return request_id
+    
+    def get_latest_pending_request(self) -> Optional[Dict]:
+        """Get the most recent pending 2FA request"""
+        # The database is authoritative: other processes (the pipeline, the webhook) create
+        # and resolve requests there, so this handler's own requests are only a fallback
+        try:
+            return self.db_manager.get_latest_pending_2fa_request()
+        except Exception as e:
+            log_step("intelligent_2fa_handler", f"Error getting latest pending request: {e}", "error")
+        
+        request_id = self.latest_pending_id()
+        if request_id is not None:
+            return {'id': request_id, 'pipeline_step': self.active_requests[request_id]['pipeline_step']}
+        return None
+    
     def clear_expired_requests(self) -> int:
         """Clear expired requests"""
         expired_count = 0
-        current_time = datetime.now()
+        now = time.monotonic()
         
         for request_id, request_data in list(self.active_requests.items()):
-            expires_at = datetime.fromisoformat(request_data['expires_at'])
-            if current_time > expires_at:
+            if now > request_data['expires_at_mono']:
                 self._cleanup_request(request_id)
                 expired_count += 1
         
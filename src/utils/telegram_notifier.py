@@ -6,6 +6,10 @@ Provides global access to Telegram bot for step tracking and debug messaging
 
 import os
 import sys
+import atexit
+import queue
+import threading
+import time
 from pathlib import Path
 
 # Add project root to path
@@ -15,74 +19,170 @@ sys.path.insert(0, str(project_root))
 from utils.utils import log_step
 from utils.enhanced_telegram_bot import EnhancedTelegramBot
 
+# Notification templates
+_LEVEL_EMOJI = {
+    'info': 'ℹ️',
+    'warning': '⚠️',
+    'error': '❌',
+    'success': '✅'
+}
+_PIPELINE_TEMPLATE = "{emoji} <b>Pipeline Notification</b>\n\n{msg}"
+_ERROR_TEMPLATE = "❌ <b>Pipeline Error</b>\n\n📝 <b>Step:</b> {step}\n🚨 <b>Error:</b> {error}"
+
 # Global bot instance
 _telegram_bot = None
+_telegram_bot_lock = threading.Lock()
+_message_batcher = None
+
+# Bot calls are handed to a single sender thread so the pipeline never waits on Telegram
+# (rate limiting and 429 retry_after sleeps happen on that thread)
+_send_queue = queue.Queue(maxsize=1000)
+_send_thread = None
+_send_thread_lock = threading.Lock()
+_DROP_DEBUG_AT = 800  # Queue depth above which debug messages are discarded
+
+def _send_loop():
+    """Run queued bot calls in order"""
+    while True:
+        func, args = _send_queue.get()
+        try:
+            func(*args)
+        except Exception as e:
+            log_step("telegram_notifier", f"Error in queued Telegram call: {e}", "error")
+        finally:
+            _send_queue.task_done()
+
+def _drain_send_queue(timeout: float = 10.0):
+    """Give queued notifications a bounded chance to go out before the process exits"""
+    deadline = time.monotonic() + timeout
+    while _send_queue.unfinished_tasks and time.monotonic() < deadline:
+        time.sleep(0.1)
+
+def _submit(func, *args, droppable: bool = False):
+    """Queue a bot call without blocking; droppable calls are shed first under backlog"""
+    global _send_thread
+    if _send_thread is None:
+        with _send_thread_lock:
+            if _send_thread is None:
+                _send_thread = threading.Thread(target=_send_loop, daemon=True)
+                _send_thread.start()
+                atexit.register(_drain_send_queue)
+    
+    if droppable and _send_queue.qsize() > _DROP_DEBUG_AT:
+        return
+    try:
+        _send_queue.put_nowait((func, args))
+    except queue.Full:
+        log_step("telegram_notifier", "Telegram send queue full, dropping notification", "warning")
+
+class _MessageBatcher:
+    """Coalesces notifications sent in quick succession into as few Telegram messages as possible"""
+    
+    def __init__(self, bot, flush_interval: float = 3.0, max_buffer: int = 4096):
+        self.bot = bot
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._buffer = []
+        self._buffered_chars = 0
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        
+        threading.Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.flush)
+    
+    def enqueue(self, message: str):
+        """Buffer a message; it is sent within flush_interval, or sooner once a full message is buffered"""
+        message = message.strip()[:self.max_buffer]
+        with self._lock:
+            self._buffer.append(message)
+            self._buffered_chars += len(message)
+            full = self._buffered_chars >= self.max_buffer
+        if full:
+            self._wakeup.set()
+    
+    def _flush_loop(self):
+        """Periodically flush buffered messages"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+    
+    def flush(self):
+        """Send buffered messages, packing as many as fit into each Telegram message"""
+        with self._lock:
+            messages, self._buffer, self._buffered_chars = self._buffer, [], 0
+        
+        separator = "\n\n"
+        batch = ""
+        for message in messages:
+            if batch and len(batch) + len(separator) + len(message) > self.max_buffer:
+                self.bot.send_message(batch)
+                batch = message
+            else:
+                batch = batch + separator + message if batch else message
+        if batch:
+            self.bot.send_message(batch)
 
 def get_telegram_bot():
     """Get global Telegram bot instance"""
     global _telegram_bot
     if _telegram_bot is None:
-        try:
-            _telegram_bot = EnhancedTelegramBot()
-            log_step("telegram_notifier", "Global Telegram bot instance created", "info")
-        except Exception as e:
-            log_step("telegram_notifier", f"Failed to create Telegram bot: {e}", "error")
-            _telegram_bot = None
+        with _telegram_bot_lock:
+            if _telegram_bot is None:
+                try:
+                    _telegram_bot = EnhancedTelegramBot()
+                    log_step("telegram_notifier", "Global Telegram bot instance created", "info")
+                except Exception as e:
+                    log_step("telegram_notifier", f"Failed to create Telegram bot: {e}", "error")
+                    _telegram_bot = None
     return _telegram_bot
 
+def get_message_batcher():
+    """Get the global notification batcher (None if the bot is unavailable)"""
+    global _message_batcher
+    if _message_batcher is None:
+        bot = get_telegram_bot()
+        if bot:
+            _message_batcher = _MessageBatcher(bot)
+    return _message_batcher
+
 def start_pipeline_step(step_name: str, step_description: str = ""):
     """Start tracking a pipeline step"""
     bot = get_telegram_bot()
     if bot:
-        bot.start_step(step_name, step_description)
+        _submit(bot.start_step, step_name, step_description)
 
 def update_step_progress(files_processed: int = 0, error: str = None, warning: str = None):
     """Update current step progress"""
     bot = get_telegram_bot()
     if bot:
-        bot.update_step_progress(files_processed, error, warning)
+        _submit(bot.update_step_progress, files_processed, error, warning)
 
 def complete_pipeline_step(success: bool = True, additional_info: str = ""):
     """Complete current pipeline step"""
     bot = get_telegram_bot()
     if bot:
-        bot.complete_step(success, additional_info)
+        _submit(bot.complete_step, success, additional_info)
 
 def send_debug_message(message: str, level: str = "info"):
     """Send debug message"""
     bot = get_telegram_bot()
     if bot:
-        bot.send_debug_message(message, level)
+        _submit(bot.send_debug_message, message, level, droppable=True)
 
 def send_pipeline_notification(message: str, level: str = "info"):
     """Send pipeline notification"""
     bot = get_telegram_bot()
     if bot and bot.pipeline_notifications:
-        level_emoji = {
-            'info': 'ℹ️',
-            'warning': '⚠️',
-            'error': '❌',
-            'success': '✅'
-        }
-        
-        formatted_message = f"""
-{level_emoji.get(level, 'ℹ️')} <b>Pipeline Notification</b>
-
-{message}
-        """
-        bot.send_message(formatted_message)
+        formatted_message = _PIPELINE_TEMPLATE.format(emoji=_LEVEL_EMOJI.get(level, 'ℹ️'), msg=message)
+        get_message_batcher().enqueue(formatted_message)
 
 def send_error_notification(error_message: str, step: str = ""):
     """Send error notification"""
     bot = get_telegram_bot()
     if bot and bot.error_notifications:
-        message = f"""
-❌ <b>Pipeline Error</b>
-
-📝 <b>Step:</b> {step or 'Unknown'}
-🚨 <b>Error:</b> {error_message}
-        """
-        bot.send_message(message)
+        message = _ERROR_TEMPLATE.format(step=step or 'Unknown', error=error_message)
+        get_message_batcher().enqueue(message)
 
 # Convenience functions for common pipeline steps
 def notify_download_started(source: str = "iCloud"):
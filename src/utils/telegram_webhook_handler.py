@@ -7,40 +7,105 @@ Handles incoming messages and commands from Telegram
 import os
 import sys
 import json
+import re
 import time
+import asyncio
 import requests
 import logging
+import threading
 from datetime import datetime
 from pathlib import Path
 import subprocess
 import psutil
 
+try:
+    from pystemd.systemd1 import Unit
+except ImportError:
+    Unit = None
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from utils.utils import log_step
-from enhanced_telegram_bot import EnhancedTelegramBot
+from utils.telegram_notifier import get_telegram_bot
 from intelligent_2fa_handler import Intelligent2FAHandler
 
+# Last processed update_id, kept across restarts so offline updates aren't replayed
+_LAST_UPDATE_ID_FILE = Path.home() / '.media-pipeline' / 'last_update_id'
+
+# Plain text messages are only treated as 2FA codes when they are exactly six digits
+_CODE_RE = re.compile(r'\A\d{6}\Z')
+
+def _render(title: str, *sections) -> str:
+    """Render a status message: the title, then blank-line separated sections of (label, value) lines"""
+    parts = [title]
+    parts.extend("\n".join(f"{label} {value}" for label, value in fields) for fields in sections)
+    return "\n\n".join(parts)
+
+class _CpuSampler(threading.Thread):
+    """Background thread keeping the latest system-wide CPU percentage"""
+    
+    def __init__(self):
+        super().__init__(daemon=True)
+        psutil.cpu_percent(interval=None)  # Prime psutil's counters
+        self.latest = 0.0
+    
+    def run(self):
+        while True:
+            time.sleep(1.0)
+            self.latest = psutil.cpu_percent(interval=None)  # Usage since the previous call
+
 class TelegramWebhookHandler:
     def __init__(self):
         """Initialize webhook handler"""
-        self.bot = EnhancedTelegramBot()
+        self.bot = get_telegram_bot()
+        if self.bot is None:
+            raise ValueError("Telegram bot could not be initialized; check TELEGRAM_BOT_TOKEN and TELEGRAM_CHAT_ID")
         self.handler = Intelligent2FAHandler()
-        self.last_update_id = 0
+        self.last_update_id = self._load_last_update_id()
+        
+        # /status and /system read the sampled CPU value instead of blocking for 1s
+        self._cpu_sampler = _CpuSampler()
+        self._cpu_sampler.start()
+        
+        # command -> (monotonic build time, message); absorbs bursts of repeated commands
+        self._status_cache = {}
+        self._boot_time = psutil.boot_time()  # Fixed for the life of the process
+        self._pipeline_unit = None  # pystemd Unit, loaded on first /status
+        
+        # getUpdates shares the bot's keep-alive connection pool to api.telegram.org
+        self._session = self.bot.session
         
         log_step("telegram_webhook_handler", "Telegram webhook handler initialized", "info")
     
     def process_update(self, update_data: dict):
         """Process incoming Telegram update"""
         try:
-            update_id = update_data.get('update_id', 0)
-            if update_id <= self.last_update_id:
-                return  # Skip duplicate updates
-            
-            self.last_update_id = update_id
+            self.last_update_id = max(self.last_update_id, update_data.get('update_id', 0))
+            self._dispatch_update(update_data)
             
+        except Exception as e:
+            log_step("telegram_webhook_handler", f"Error processing update: {e}", "error")
+    
+    def _load_last_update_id(self) -> int:
+        """Read the persisted last update_id (0 if none)"""
+        try:
+            return int(_LAST_UPDATE_ID_FILE.read_text().strip())
+        except (OSError, ValueError):
+            return 0
+    
+    def _save_last_update_id(self):
+        """Persist the last processed update_id"""
+        try:
+            _LAST_UPDATE_ID_FILE.parent.mkdir(parents=True, exist_ok=True)
+            _LAST_UPDATE_ID_FILE.write_text(str(self.last_update_id))
+        except OSError as e:
+            log_step("telegram_webhook_handler", f"Could not save last update id: {e}", "warning")
+    
+    def _dispatch_update(self, update_data: dict):
+        """Route an update to the handler for its type"""
+        try:
             # Handle different types of updates
             if 'message' in update_data:
                 self._handle_message(update_data['message'])
@@ -62,9 +127,11 @@ class TelegramWebhookHandler:
             # Handle commands
             if text.startswith('/'):
                 self._handle_command(text, message)
-            else:
+            elif _CODE_RE.match(text):
                 # Handle 2FA code submission
                 self._handle_2fa_code(text, message)
+            else:
+                self.bot.send_message("❓ Please send a 6-digit 2FA code, or use /help to see available commands.")
             
         except Exception as e:
             log_step("telegram_webhook_handler", f"Error handling message: {e}", "error")
@@ -112,175 +179,234 @@ class TelegramWebhookHandler:
     def _handle_2fa_code(self, text: str, message: dict):
         """Handle 2FA code submission"""
         try:
-            # Check if it looks like a 2FA code (6 digits)
-            if text.isdigit() and len(text) == 6:
-                # Find the most recent pending request
-                active_requests = self.handler.get_active_requests()
-                pending_requests = [req for req in active_requests.values() if req['status'] == 'pending']
+            # Find the most recent pending request
+            latest_request = self.handler.get_latest_pending_request()
+            
+            if latest_request:
+                request_id = latest_request['id']
                 
-                if pending_requests:
-                    # Get the most recent request
-                    latest_request = max(pending_requests, key=lambda x: x['created_at'])
-                    request_id = latest_request['id']
-                    
-                    if self.handler.submit_2fa_code(request_id, text):
-                        self.bot.send_message(f"✅ 2FA code received and submitted!\n\n🔐 Code: {text}\n📝 Step: {latest_request['pipeline_step']}")
-                        log_step("telegram_webhook_handler", f"2FA code submitted: {text}", "info")
-                    else:
-                        self.bot.send_message("❌ Failed to submit 2FA code. Please try again.")
+                if self.handler.submit_2fa_code(request_id, text):
+                    self.bot.send_message(f"✅ 2FA code received and submitted!\n\n🔐 Code: {text}\n📝 Step: {latest_request['pipeline_step']}")
+                    log_step("telegram_webhook_handler", f"2FA code submitted: {text}", "info")
                 else:
-                    # Create a new request if none exists (for manual submissions)
-                    request_id = self.handler.create_2fa_request("Manual 2FA Submission", 5)
-                    if self.handler.submit_2fa_code(request_id, text):
-                        self.bot.send_message(f"✅ 2FA code received!\n\n🔐 Code: {text}\n📝 Created manual request")
-                        log_step("telegram_webhook_handler", f"Manual 2FA code submitted: {text}", "info")
-                    else:
-                        self.bot.send_message("❌ Failed to process 2FA code. Please try again.")
+                    self.bot.send_message("❌ Failed to submit 2FA code. Please try again.")
             else:
-                self.bot.send_message("❓ Please send a 6-digit 2FA code, or use /help to see available commands.")
+                # Create a new request if none exists (for manual submissions)
+                request_id = self.handler.create_2fa_request("Manual 2FA Submission", 5)
+                if self.handler.submit_2fa_code(request_id, text):
+                    self.bot.send_message(f"✅ 2FA code received!\n\n🔐 Code: {text}\n📝 Created manual request")
+                    log_step("telegram_webhook_handler", f"Manual 2FA code submitted: {text}", "info")
+                else:
+                    self.bot.send_message("❌ Failed to process 2FA code. Please try again.")
             
         except Exception as e:
             log_step("telegram_webhook_handler", f"Error handling 2FA code: {e}", "error")
             self.bot.send_message(f"❌ Error processing 2FA code: {str(e)}")
     
+    def _cached(self, key: str, ttl: float, builder) -> str:
+        """Return the message built for key within the last ttl seconds, or build a new one"""
+        now = time.monotonic()
+        cached = self._status_cache.get(key)
+        if cached and now - cached[0] < ttl:
+            return cached[1]
+        
+        message = builder()
+        self._status_cache[key] = (now, message)
+        return message
+    
     def _send_pipeline_status(self):
         """Send current pipeline status"""
         try:
-            # Check if pipeline service is running
-            result = subprocess.run(['systemctl', 'is-active', 'media-pipeline'], 
-                                 capture_output=True, text=True)
-            service_status = result.stdout.strip()
-            
-            # Get system stats
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            
-            status_emoji = "✅" if service_status == "active" else "❌"
-            
-            message = f"""
-📊 <b>Pipeline Status</b>
-
-{status_emoji} <b>Service:</b> {service_status.title()}
-💻 <b>CPU:</b> {cpu_percent}%
-🧠 <b>Memory:</b> {memory.percent}%
-🕐 <b>Time:</b> {datetime.now().strftime('%H:%M:%S')}
-
-<b>Active 2FA Requests:</b> {len(self.handler.get_active_requests())}
-            """
-            
-            self.bot.send_message(message)
-            
+            self.bot.send_message(self._cached('status', 3, self._build_pipeline_status))
         except Exception as e:
             log_step("telegram_webhook_handler", f"Error sending pipeline status: {e}", "error")
     
+    def _build_pipeline_status(self) -> str:
+        """Build the pipeline status message"""
+        # Check if pipeline service is running
+        service_status = self._pipeline_service_state()
+        
+        # Get system stats
+        cpu_percent = self._cpu_sampler.latest
+        memory = psutil.virtual_memory()
+        
+        status_emoji = "✅" if service_status == "active" else "❌"
+        
+        return _render("📊 <b>Pipeline Status</b>", [
+            (f"{status_emoji} <b>Service:</b>", service_status.title()),
+            ("💻 <b>CPU:</b>", f"{cpu_percent}%"),
+            ("🧠 <b>Memory:</b>", f"{memory.percent}%"),
+            ("🕐 <b>Time:</b>", datetime.now().strftime('%H:%M:%S')),
+        ], [
+            ("<b>Active 2FA Requests:</b>", len(self.handler.get_active_requests())),
+        ])
+    
     def _send_2fa_status(self):
         """Send 2FA requests status"""
         try:
-            active_requests = self.handler.get_active_requests()
-            
-            if not active_requests:
-                self.bot.send_message("✅ No active 2FA requests")
-                return
-            
-            message = "🔐 <b>Active 2FA Requests</b>\n\n"
-            
-            for req_id, req_data in active_requests.items():
-                status_emoji = "⏳" if req_data['status'] == 'pending' else "✅"
-                created_time = datetime.fromisoformat(req_data['created_at']).strftime('%H:%M:%S')
-                
-                message += f"{status_emoji} <b>{req_data['pipeline_step']}</b>\n"
-                message += f"   ID: <code>{req_id}</code>\n"
-                message += f"   Created: {created_time}\n"
-                message += f"   Status: {req_data['status']}\n\n"
-            
-            self.bot.send_message(message)
-            
+            self.bot.send_message(self._cached('2fa_status', 2, self._build_2fa_status))
         except Exception as e:
             log_step("telegram_webhook_handler", f"Error sending 2FA status: {e}", "error")
     
+    def _pipeline_service_state(self) -> str:
+        """Get the media-pipeline unit's ActiveState over D-Bus, or from systemctl without pystemd"""
+        if Unit is not None:
+            try:
+                if self._pipeline_unit is None:
+                    unit = Unit(b'media-pipeline.service')
+                    unit.load()
+                    self._pipeline_unit = unit
+                return self._pipeline_unit.Unit.ActiveState.decode()
+            except Exception as e:
+                log_step("telegram_webhook_handler", f"D-Bus unit query failed, using systemctl: {e}", "debug")
+        
+        result = subprocess.run(['systemctl', 'is-active', 'media-pipeline'], 
+                             capture_output=True, text=True)
+        return result.stdout.strip()
+    
+    def _build_2fa_status(self) -> str:
+        """Build the 2FA requests status message"""
+        active_requests = self.handler.get_active_requests()
+        
+        if not active_requests:
+            return "✅ No active 2FA requests"
+        
+        return _render("🔐 <b>Active 2FA Requests</b>", *[
+            [
+                ("⏳" if req_data['status'] == 'pending' else "✅", f"<b>{req_data['pipeline_step']}</b>"),
+                ("   ID:", f"<code>{req_id}</code>"),
+                ("   Created:", datetime.fromisoformat(req_data['created_at']).strftime('%H:%M:%S')),
+                ("   Status:", req_data['status']),
+            ]
+            for req_id, req_data in active_requests.items()
+        ])
+    
     def _send_recent_logs(self):
         """Send recent pipeline logs"""
         try:
-            log_file = Path('/opt/media-pipeline/logs/pipeline.log')
-            if not log_file.exists():
-                self.bot.send_message("📝 No log file found")
-                return
-            
-            # Get last 10 lines
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-            
-            recent_lines = lines[-10:] if len(lines) >= 10 else lines
-            log_content = ''.join(recent_lines)
-            
-            # Truncate if too long
-            if len(log_content) > 3000:
-                log_content = "..." + log_content[-3000:]
-            
-            message = f"""
+            self.bot.send_message(self._cached('logs', 2, self._build_recent_logs))
+        except Exception as e:
+            log_step("telegram_webhook_handler", f"Error sending logs: {e}", "error")
+    
+    def _build_recent_logs(self, tail_bytes: int = 8192) -> str:
+        """Build the recent logs message from the tail of the pipeline log"""
+        log_file = Path('/opt/media-pipeline/logs/pipeline.log')
+        if not log_file.exists():
+            return "📝 No log file found"
+        
+        # Get last 10 lines, reading only the end of the file
+        size = log_file.stat().st_size
+        start = max(0, size - tail_bytes)
+        with open(log_file, 'rb') as f:
+            f.seek(start)
+            tail = f.read().decode('utf-8', 'replace')
+        
+        lines = tail.splitlines(keepends=True)
+        if start > 0 and lines:
+            lines = lines[1:]  # First line is probably cut off by the seek
+        log_content = ''.join(lines[-10:])
+        
+        # Truncate if too long
+        if len(log_content) > 3000:
+            log_content = "..." + log_content[-3000:]
+        
+        message = f"""
 📝 <b>Recent Pipeline Logs</b>
 
 <code>{log_content}</code>
-            """
-            
-            self.bot.send_message(message)
-            
-        except Exception as e:
-            log_step("telegram_webhook_handler", f"Error sending logs: {e}", "error")
+        """
+        
+        return message
     
     def _send_system_info(self):
         """Send system information"""
         try:
-            # Get system stats
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory = psutil.virtual_memory()
-            disk = psutil.disk_usage('/')
-            
-            # Get uptime
-            uptime_seconds = time.time() - psutil.boot_time()
-            uptime_hours = uptime_seconds / 3600
-            
-            message = f"""
-💻 <b>System Information</b>
-
-🖥️ <b>CPU Usage:</b> {cpu_percent}%
-🧠 <b>Memory:</b> {memory.percent}% ({memory.used // (1024**3)}GB / {memory.total // (1024**3)}GB)
-💾 <b>Disk:</b> {disk.percent}% ({disk.used // (1024**3)}GB / {disk.total // (1024**3)}GB)
-⏰ <b>Uptime:</b> {uptime_hours:.1f} hours
-🕐 <b>Time:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-            """
-            
-            self.bot.send_message(message)
-            
+            self.bot.send_message(self._cached('system', 5, self._build_system_info))
         except Exception as e:
             log_step("telegram_webhook_handler", f"Error sending system info: {e}", "error")
     
+    def _build_system_info(self) -> str:
+        """Build the system information message"""
+        # Get system stats
+        cpu_percent = self._cpu_sampler.latest
+        memory = psutil.virtual_memory()
+        
+        # Disk usage straight from one statvfs call (same figures as psutil.disk_usage)
+        st = os.statvfs('/')
+        disk_total = st.f_blocks * st.f_frsize
+        disk_used = (st.f_blocks - st.f_bfree) * st.f_frsize
+        disk_avail = st.f_bavail * st.f_frsize
+        disk_percent = round(disk_used / (disk_used + disk_avail) * 100, 1) if disk_used + disk_avail else 0.0
+        
+        # Get uptime
+        uptime_seconds = time.time() - self._boot_time
+        uptime_hours = uptime_seconds / 3600
+        
+        return _render("💻 <b>System Information</b>", [
+            ("🖥️ <b>CPU Usage:</b>", f"{cpu_percent}%"),
+            ("🧠 <b>Memory:</b>", f"{memory.percent}% ({memory.used // (1024**3)}GB / {memory.total // (1024**3)}GB)"),
+            ("💾 <b>Disk:</b>", f"{disk_percent}% ({disk_used // (1024**3)}GB / {disk_total // (1024**3)}GB)"),
+            ("⏰ <b>Uptime:</b>", f"{uptime_hours:.1f} hours"),
+            ("🕐 <b>Time:</b>", datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+        ])
+    
     def start_polling(self):
         """Start polling for updates"""
+        asyncio.run(self.run())
+    
+    async def run(self):
+        """Poll for updates while a single worker handles them in order"""
         log_step("telegram_webhook_handler", "Starting Telegram polling", "info")
+        url = f"{self.bot.base_url}/getUpdates"
         
-        while True:
-            try:
-                # Get updates
-                url = f"{self.bot.base_url}/getUpdates"
-                params = {'offset': self.last_update_id + 1, 'timeout': 30}
-                
-                response = requests.get(url, params=params, timeout=35)
-                
-                if response.status_code == 200:
-                    data = response.json()
+        # Handlers block on psutil, systemctl, the DB and sendMessage, so they run in a
+        # worker thread; one consumer keeps them serial (the bot, 2FA and status caches
+        # aren't thread-safe, and a 2FA code must not overtake the command before it)
+        updates_queue = asyncio.Queue()
+        worker = asyncio.create_task(self._consume_updates(updates_queue))
+        
+        # Fetch position runs ahead of last_update_id, which only advances once an
+        # update has been handled; after a restart unhandled updates are fetched again
+        next_offset = self.last_update_id + 1
+        
+        try:
+            while True:
+                try:
+                    # Long poll: Telegram holds the request open until updates arrive (up to 50s),
+                    # so no client-side delay is needed between requests
+                    params = {'offset': next_offset, 'timeout': 50}
                     
-                    if data.get('ok') and data.get('result'):
-                        for update in data['result']:
-                            self.process_update(update)
-                else:
-                    log_step("telegram_webhook_handler", f"Error getting updates: {response.status_code}", "warning")
-                
-                time.sleep(1)  # Small delay between requests
-                
-            except Exception as e:
-                log_step("telegram_webhook_handler", f"Error in polling loop: {e}", "error")
-                time.sleep(5)  # Wait before retrying
+                    response = await asyncio.to_thread(self._session.get, url, params=params, timeout=60)
+                    
+                    if response.status_code == 200:
+                        data = response.json()
+                        
+                        if data.get('ok') and data.get('result'):
+                            # getUpdates with offset=last+1 never returns an update twice
+                            updates = data['result']
+                            next_offset = max(u['update_id'] for u in updates) + 1
+                            
+                            for update in updates:
+                                updates_queue.put_nowait(update)
+                    else:
+                        log_step("telegram_webhook_handler", f"Error getting updates: {response.status_code}", "warning")
+                        await asyncio.sleep(5)  # Back off before retrying
+                    
+                except Exception as e:
+                    log_step("telegram_webhook_handler", f"Error in polling loop: {e}", "error")
+                    await asyncio.sleep(5)  # Wait before retrying
+        finally:
+            worker.cancel()
+    
+    async def _consume_updates(self, updates_queue: asyncio.Queue):
+        """Handle queued updates one at a time, in arrival order"""
+        while True:
+            update = await updates_queue.get()
+            await asyncio.to_thread(self._dispatch_update, update)
+            
+            # Persist only after handling, so a crash mid-batch redelivers the rest
+            self.last_update_id = max(self.last_update_id, update['update_id'])
+            await asyncio.to_thread(self._save_last_update_id)
 
 def main():
     """Main function"""
@@ -4,22 +4,36 @@ Core utility functions for the media pipeline system
 """
 
 import os
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
+import shutil
+import sys
+import threading
 import time
 import hashlib
-import stat
-import pwd
-import grp
+import mmap
 import json
+import re
 import uuid
-from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Union
-from datetime import datetime
+from typing import TYPE_CHECKING, ClassVar, Dict, Any, Iterator, Optional, List, Tuple, Union
+from datetime import datetime, timedelta
 from dataclasses import dataclass
 
 from dotenv import load_dotenv
-from supabase import create_client, Client
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+try:
+    from blake3 import blake3  # Optional: SIMD/multithreaded hash for DEDUPLICATION_HASH_ALGORITHM=blake3
+except ImportError:
+    blake3 = None
 
 
 @dataclass
@@ -30,9 +44,14 @@ class Config:
     log_level: str
     log_file: str
     
+    _loaded: ClassVar[Optional['Config']] = None
+    
     @classmethod
     def load(cls) -> 'Config':
-        """Load configuration from environment"""
+        """Load configuration from environment (settings.env is only read once per process)"""
+        if cls._loaded is not None:
+            return cls._loaded
+        
         # Try multiple paths to find the config file
         config_paths = [
             "config/settings.env",  # Relative to current directory
@@ -50,12 +69,24 @@ class Config:
         if not config_loaded:
             print(f"Warning: Could not find config file. Tried: {config_paths}")
         
-        return cls(
+        cls._loaded = cls(
             supabase_url=os.getenv("SUPABASE_URL", ""),
             supabase_key=os.getenv("SUPABASE_KEY", ""),
             log_level=os.getenv("LOG_LEVEL", "INFO").upper(),
             log_file=os.getenv("PIPELINE_LOG_FILE", "/opt/media-pipeline/logs/pipeline.log")
         )
+        return cls._loaded
+
+
+class _QueueDrainHandler(logging.handlers.MemoryHandler):
+    """Buffer records for the file handler; write them out when full, on errors, or once the queue is drained"""
+    
+    def __init__(self, capacity: int, flushLevel: int, target: logging.Handler, log_queue: queue.Queue):
+        super().__init__(capacity, flushLevel=flushLevel, target=target)
+        self.log_queue = log_queue
+    
+    def shouldFlush(self, record: logging.LogRecord) -> bool:
+        return super().shouldFlush(record) or self.log_queue.empty()
 
 
 class Logger:
@@ -63,6 +94,7 @@ class Logger:
     
     def __init__(self, config: Config):
         self.config = config
+        self.listener: Optional[logging.handlers.QueueListener] = None
         self.logger = self._setup_logger()
     
     def _setup_logger(self) -> logging.Logger:
@@ -75,12 +107,14 @@ class Logger:
         
         # Ensure log file exists and is writable
         try:
-            if not os.path.exists(self.config.log_file):
+            st = FileManager.inspect(self.config.log_file)
+            if st is None:
                 os.makedirs(os.path.dirname(self.config.log_file), exist_ok=True)
                 open(self.config.log_file, 'a').close()
             
             # Set proper permissions
-            os.chmod(self.config.log_file, 0o666)
+            if st is None or st.st_mode & 0o777 != 0o666:
+                os.chmod(self.config.log_file, 0o666)
             
             # File handler
             file_handler = logging.FileHandler(self.config.log_file)
@@ -99,8 +133,17 @@ class Logger:
             file_handler.setFormatter(formatter)
             console_handler.setFormatter(formatter)
             
-            logger.addHandler(file_handler)
-            logger.addHandler(console_handler)
+            # Callers only enqueue; a listener thread does the writes, batching file
+            # records while a burst is queued and writing them as soon as it drains
+            log_queue = queue.Queue(-1)
+            buffered_file_handler = _QueueDrainHandler(1024, logging.ERROR, file_handler, log_queue)
+            self.listener = logging.handlers.QueueListener(
+                log_queue, buffered_file_handler, console_handler, respect_handler_level=True
+            )
+            self.listener.start()
+            atexit.register(self.listener.stop)  # Drains the queue; logging.shutdown then flushes the buffer
+            
+            logger.addHandler(logging.handlers.QueueHandler(log_queue))
             
         except Exception as e:
             # Fallback to console logging
@@ -132,13 +175,16 @@ class SupabaseManager:
     
     def __init__(self, config: Config):
         self.config = config
-        self.client: Optional[Client] = None
+        self.client: Optional["Client"] = None
         self._initialize_client()
     
     def _initialize_client(self) -> None:
         """Initialize Supabase client"""
         try:
             if self.config.supabase_url and self.config.supabase_key:
+                # Imported here, not at the top: supabase pulls in httpx/postgrest/realtime,
+                # which most pipeline steps never need
+                from supabase import create_client
                 self.client = create_client(self.config.supabase_url, self.config.supabase_key)
             else:
                 print("Warning: Supabase credentials not found")
@@ -149,7 +195,7 @@ class SupabaseManager:
         """Check if Supabase client is connected"""
         return self.client is not None
     
-    def get_client(self) -> Optional[Client]:
+    def get_client(self) -> Optional["Client"]:
         """Get Supabase client"""
         return self.client
 
@@ -179,7 +225,6 @@ class DatabaseManager:
                 "file_size": file_size,
                 "source_type": source_type,
                 "batch_id": batch_id,
-                "created_at": datetime.now().isoformat(),
                 "status": "pending"
             }
             
@@ -210,7 +255,6 @@ class DatabaseManager:
                 "source_type": source_type,
                 "file_count": file_count,
                 "total_size": total_size,
-                "created_at": datetime.now().isoformat(),
                 "status": "processing"
             }
             
@@ -287,8 +331,7 @@ class DatabaseManager:
             
             record = {
                 "file_path": file_path,
-                "duplicate_of": duplicate_of,
-                "created_at": datetime.now().isoformat()
+                "duplicate_of": duplicate_of
             }
             
             result = client.table("duplicate_files").insert(record).execute()
@@ -299,9 +342,92 @@ class DatabaseManager:
             return False
 
 
+@lru_cache(maxsize=32)
+def _uid(user: str) -> int:
+    """Resolve a user name once (NSS lookups may go over the network)"""
+    import pwd  # POSIX-only; imported here so the module loads without it
+    return pwd.getpwnam(user).pw_uid
+
+
+@lru_cache(maxsize=32)
+def _gid(group: str) -> int:
+    """Resolve a group name once"""
+    import grp
+    return grp.getgrnam(group).gr_gid
+
+
+@lru_cache(maxsize=8)
+def _hash_algorithm(algorithm: str) -> str:
+    """Map blake3 to md5 when the optional package is missing, warning once"""
+    if algorithm == "blake3" and blake3 is None:
+        log_step("utils", "DEDUPLICATION_HASH_ALGORITHM=blake3 but the blake3 package is not installed; "
+                          "hashing with md5 instead", "warning")
+        return "md5"
+    return algorithm
+
+
+# Runs as root under one long-lived sudo: reads JSON [op, *args] lines, answers OK or ERR <reason>
+_SUDO_HELPER_SRC = """
+import json, os, shutil, sys
+for line in sys.stdin:
+    try:
+        op, *args = json.loads(line)
+        if op == "cp":
+            shutil.copy(args[0], args[1])
+        elif op == "chown":
+            shutil.chown(args[0], args[1], args[2])
+        elif op == "chmod":
+            os.chmod(args[0], int(args[1], 8))
+        else:
+            raise ValueError("unknown op " + repr(op))
+        print("OK", flush=True)
+    except Exception as e:
+        print("ERR " + str(e).replace(chr(10), " "), flush=True)
+"""
+
+
 class FileManager:
     """File operations manager"""
     
+    # Files at least this big are hashed straight from a read-only mapping of the page cache
+    MMAP_HASH_THRESHOLD = 16 * 1024 * 1024
+    
+    _sudo_helper = None
+    _sudo_helper_lock = threading.Lock()
+    _sudo_helper_unavailable = False
+    
+    @classmethod
+    def _run_privileged(cls, op: str, *args: str) -> Optional[bool]:
+        """Run a file operation through the shared sudo helper; None if the helper can't be used"""
+        import subprocess
+        with cls._sudo_helper_lock:
+            if cls._sudo_helper_unavailable:
+                return None
+            try:
+                if cls._sudo_helper is None:
+                    # One sudo + interpreter start for the whole run instead of one fork/exec/PAM per file
+                    cls._sudo_helper = subprocess.Popen(
+                        ['sudo', '-n', sys.executable, '-u', '-c', _SUDO_HELPER_SRC],
+                        stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True
+                    )
+                    atexit.register(cls._sudo_helper.stdin.close)
+                
+                cls._sudo_helper.stdin.write(json.dumps([op, *args]) + "\n")
+                cls._sudo_helper.stdin.flush()
+                reply = cls._sudo_helper.stdout.readline()
+            except (OSError, ValueError):
+                reply = ""
+            
+            if not reply:
+                # sudo refused (no NOPASSWD rule for the interpreter) or the helper died
+                cls._sudo_helper_unavailable = True
+                return None
+            
+            if reply.startswith("OK"):
+                return True
+            print(f"Privileged {op} failed for {args[0]}: {reply[4:].strip()}")
+            return False
+    
     @staticmethod
     def ensure_directory_exists(directory: str) -> bool:
         """Ensure directory exists with proper permissions"""
@@ -309,9 +435,10 @@ class FileManager:
             path = Path(directory)
             path.mkdir(parents=True, exist_ok=True)
             
-            # Set proper permissions
+            # Set proper permissions (skipping the chmod, and any sudo, when already right)
             try:
-                os.chmod(directory, 0o755)
+                if path.stat().st_mode & 0o777 != 0o755:
+                    os.chmod(directory, 0o755)
             except PermissionError:
                 # For NAS mounts, try with sudo
                 import subprocess
@@ -325,16 +452,53 @@ class FileManager:
     @staticmethod
     def calculate_file_hash(file_path: str, algorithm: str = "sha256") -> Optional[str]:
         """Calculate hash of a file"""
+        algorithm = _hash_algorithm(algorithm)
         try:
-            hash_obj = hashlib.new(algorithm)
-            with open(file_path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b""):
+            hash_obj = None
+            if algorithm == "blake3":
+                hash_obj = blake3(max_threads=blake3.AUTO)
+                if hasattr(hash_obj, 'update_mmap'):  # blake3>=0.3.2 maps and reads the file in Rust
+                    return hash_obj.update_mmap(file_path).hexdigest()
+            
+            with open(file_path, 'rb', buffering=0) as f:
+                if os.fstat(f.fileno()).st_size >= FileManager.MMAP_HASH_THRESHOLD:
+                    if hash_obj is None:
+                        hash_obj = hashlib.new(algorithm)
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                        if hasattr(mm, 'madvise'):
+                            mm.madvise(mmap.MADV_SEQUENTIAL)  # Read ahead aggressively, drop pages behind
+                        hash_obj.update(mm)
+                    return hash_obj.hexdigest()
+                
+                if hash_obj is None and hasattr(hashlib, 'file_digest'):  # Python 3.11+: read/update loop runs in C
+                    return hashlib.file_digest(f, algorithm).hexdigest()
+                
+                if hash_obj is None:
+                    hash_obj = hashlib.new(algorithm)
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
                     hash_obj.update(chunk)
-            return hash_obj.hexdigest()
+                return hash_obj.hexdigest()
         except Exception as e:
             print(f"Error calculating hash for {file_path}: {e}")
             return None
     
+    @staticmethod
+    def hash_files_parallel(file_paths: List[str], algorithm: str = "sha256", 
+                            max_workers: Optional[int] = None) -> List[Optional[str]]:
+        """Calculate hashes of many files concurrently, in input order"""
+        # hashlib releases the GIL while digesting, so threads use every core
+        # without the pickling and start-up cost of a process pool
+        with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+            return list(executor.map(lambda path: FileManager.calculate_file_hash(path, algorithm), file_paths))
+    
+    @staticmethod
+    def inspect(file_path: str) -> Optional[os.stat_result]:
+        """Stat a file once (None if it doesn't exist) so size, mtime and mode come from one call"""
+        try:
+            return os.stat(file_path)
+        except FileNotFoundError:
+            return None
+    
     @staticmethod
     def get_file_size(file_path: str) -> int:
         """Get file size in bytes"""
@@ -349,13 +513,15 @@ class FileManager:
                             group: str = "media-pipeline") -> bool:
         """Set file permissions"""
         try:
-            uid = pwd.getpwnam(user).pw_uid
-            gid = grp.getgrnam(group).gr_gid
-            os.chown(file_path, uid, gid)
+            os.chown(file_path, _uid(user), _gid(group))
             os.chmod(file_path, 0o644)
             return True
         except PermissionError:
             # For NAS mounts, try with sudo
+            ok = FileManager._run_privileged("chown", file_path, user, group)
+            if ok is not None:
+                return ok and FileManager._run_privileged("chmod", file_path, "644") is True
+            
             import subprocess
             try:
                 subprocess.run(['sudo', 'chown', f'{user}:{group}', file_path], check=True)
@@ -376,7 +542,19 @@ class FileManager:
             dst_dir = Path(dst).parent
             dst_dir.mkdir(parents=True, exist_ok=True)
             
-            # Copy with sudo
+            # Copy without privileges first: shutil.copy (like cp) moves the data with
+            # os.sendfile, so it never passes through user space
+            try:
+                shutil.copy(src, dst)
+                return True
+            except PermissionError:
+                pass
+            
+            # Copy with sudo, through the persistent helper when sudo allows it
+            ok = FileManager._run_privileged("cp", src, dst)
+            if ok is not None:
+                return ok
+            
             result = subprocess.run(['sudo', 'cp', src, dst], check=True, capture_output=True)
             return True
         except subprocess.CalledProcessError as e:
@@ -391,7 +569,7 @@ class ConfigManager:
     """Configuration management"""
     
     def __init__(self):
-        self.config = Config.load()
+        self.config = Config.load()  # Cached: returns the instance the module already loaded
     
     def get_config_value(self, key: str, default: Any = None) -> Any:
         """Get configuration value"""
@@ -422,18 +600,237 @@ class ConfigManager:
         return True
 
 
-# Global instances
+# Global instances (settings.env is loaded at import so os.getenv sees it everywhere)
 config = Config.load()
-logger = Logger(config)
-supabase_manager = SupabaseManager(config)
-database_manager = DatabaseManager(supabase_manager)
 file_manager = FileManager()
 config_manager = ConfigManager()
 
+# The logger (log file, listener thread) and the Supabase client (HTTP bootstrap) are
+# only built on first use, so scripts that never log or touch Supabase don't pay for them
+_LAZY_INSTANCES = {
+    'logger': lambda: Logger(config),
+    'supabase_manager': lambda: SupabaseManager(config),
+    'database_manager': lambda: DatabaseManager(_instance('supabase_manager')),
+    'supabase': lambda: _instance('supabase_manager').get_client(),  # Backward compatibility
+}
+_instances: Dict[str, Any] = {}
+_instances_lock = threading.RLock()
+
+def _instance(name: str) -> Any:
+    """Get a lazily created global instance"""
+    try:
+        return _instances[name]
+    except KeyError:
+        with _instances_lock:
+            if name not in _instances:
+                _instances[name] = _LAZY_INSTANCES[name]()
+            return _instances[name]
+
+def __getattr__(name: str) -> Any:
+    """Create logger, supabase_manager, database_manager and supabase on first access"""
+    if name in _LAZY_INSTANCES:
+        return _instance(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+_db_manager = None
+
+def _local_db():
+    """Get the shared local database manager"""
+    global _db_manager
+    if _db_manager is None:
+        # Imported here, not at the top: core.local_db_manager imports log_step from this module
+        from core.local_db_manager import get_db_manager
+        _db_manager = get_db_manager()
+    return _db_manager
+
+# SQL for the local database wrappers, built once at import. $n statements are run as
+# prepared statements under the given name; %s ones go through execute_values/cursors
+_SQL_INSERT_MEDIA_FILE = ("insert_media_file", """
+    INSERT INTO media_files (filename, file_path, file_size, file_hash, source_type, batch_id, status)
+    VALUES ($1, $2, $3, $4, $5, $6, 'downloaded')
+    RETURNING id
+""")
+_SQL_INSERT_BATCH = ("insert_batch", """
+    INSERT INTO batches (source_type, file_count, total_size_gb, status)
+    VALUES ($1, $2, $3, 'created')
+    RETURNING id
+""")
+_SQL_SELECT_MEDIA_FILE_BY_HASH = ("select_media_file_by_hash", """
+    SELECT id FROM media_files 
+    WHERE file_hash = $1 
+    LIMIT 1
+""")
+_SQL_INSERT_MEDIA_FILES = """
+    INSERT INTO media_files (filename, file_path, file_size, file_hash, source_type, batch_id, status)
+    VALUES %s
+    RETURNING id
+"""
+_SQL_UPDATE_BATCH_STATUSES = """
+    UPDATE batches AS b
+    SET status = v.status, updated_at = NOW()
+    FROM (VALUES %s) AS v(id, status)
+    WHERE b.id = v.id::uuid
+"""
+_SQL_SELECT_FILES_BY_STATUS = """
+    SELECT id, filename, file_path, file_size, file_hash, source_type, batch_id, status, created_at
+    FROM media_files 
+    WHERE status = %s
+    ORDER BY created_at DESC
+"""
+_SQL_COUNT_KNOWN_HASHES = "SELECT COUNT(*) AS n FROM media_files WHERE file_hash IS NOT NULL"
+_SQL_SELECT_KNOWN_HASHES = "SELECT file_hash, created_at FROM media_files WHERE file_hash IS NOT NULL"
+_SQL_SELECT_KNOWN_HASHES_SINCE = _SQL_SELECT_KNOWN_HASHES + " AND created_at > %s"
+_SQL_SELECT_MEDIA_FILE_BY_HASH_SINCE = ("select_media_file_by_hash_since", """
+    SELECT id FROM media_files 
+    WHERE file_hash = $1 AND created_at > $2
+    LIMIT 1
+""")
+
+class _HashBloomFilter:
+    """Bloom filter over hex digests: no false negatives, ~0.1% false positives at capacity"""
+    
+    HASHES = 10
+    _USABLE_RE = re.compile(r"[0-9a-fA-F]{32,}")
+    
+    @classmethod
+    def usable(cls, file_hash) -> bool:
+        """Whether a value is a hex digest long enough to derive probe positions from"""
+        return isinstance(file_hash, str) and cls._USABLE_RE.fullmatch(file_hash) is not None
+    
+    def __init__(self, capacity: int):
+        self.capacity = max(capacity, 1)
+        self.count = 0
+        self.size = self.capacity * 15  # ~14.4 bits per item for 0.1% with 10 probes
+        self.bits = bytearray(self.size // 8 + 1)
+    
+    def _positions(self, file_hash: str):
+        # The digest is already uniformly distributed, so its halves serve as the two base hashes
+        h1 = int(file_hash[:16], 16)
+        h2 = int(file_hash[16:32], 16) | 1
+        return ((h1 + i * h2) % self.size for i in range(self.HASHES))
+    
+    def add(self, file_hash: str) -> None:
+        if not self.usable(file_hash):
+            return  # Such hashes are never looked up in the filter either
+        for pos in self._positions(file_hash):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+    
+    def __contains__(self, file_hash: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(file_hash))
+
+
+_KNOWN_HASHES_TTL = 300  # Seconds between incremental refreshes
+_KNOWN_HASHES_OVERLAP = timedelta(minutes=5)  # created_at is set at transaction start, not commit
+_known_hashes: Optional[_HashBloomFilter] = None
+_known_hashes_lock = threading.Lock()
+_known_hashes_loaded_at: Optional[float] = None  # monotonic time of the last load attempt
+_known_hashes_as_of: Optional[datetime] = None  # newest created_at the filter has seen
+
+def _load_known_hashes(local_db, known: _HashBloomFilter, query: str, params: tuple = None) -> int:
+    """Add the hashes a query returns to the filter, advancing the created_at watermark"""
+    global _known_hashes_as_of
+    added = 0
+    for row in local_db._iter_query(query, params, batch_size=10000):
+        known.add(row['file_hash'])
+        added += 1
+        created_at = row['created_at']
+        if created_at is not None and (_known_hashes_as_of is None or created_at > _known_hashes_as_of):
+            _known_hashes_as_of = created_at
+    return added
+
+def _known_hash_filter() -> Tuple[Optional[_HashBloomFilter], Optional[datetime]]:
+    """Get the filter of hashes already in media_files and the newest created_at it covers
+
+    The first call loads every hash; later calls, at most every _KNOWN_HASHES_TTL
+    seconds, only add rows created since the watermark.
+    """
+    global _known_hashes, _known_hashes_loaded_at, _known_hashes_as_of
+    with _known_hashes_lock:
+        now = time.monotonic()
+        if _known_hashes_loaded_at is None or now - _known_hashes_loaded_at >= _KNOWN_HASHES_TTL:
+            _known_hashes_loaded_at = now
+            try:
+                local_db = _local_db()
+                if _known_hashes is not None and _known_hashes.count > _known_hashes.capacity:
+                    _known_hashes = None  # Past capacity the false positive rate climbs; rebuild
+                if _known_hashes is not None and _known_hashes_as_of is not None:
+                    added = _load_known_hashes(local_db, _known_hashes, _SQL_SELECT_KNOWN_HASHES_SINCE,
+                                               (_known_hashes_as_of - _KNOWN_HASHES_OVERLAP,))
+                    log_step("utils", f"Refreshed known file hashes ({added} recent)", "debug")
+                else:
+                    count = local_db._execute_query(_SQL_COUNT_KNOWN_HASHES, fetch=True)[0]['n']
+                    known = _HashBloomFilter(max(count * 2, 100000))  # Headroom for later refreshes
+                    _known_hashes_as_of = None
+                    _load_known_hashes(local_db, known, _SQL_SELECT_KNOWN_HASHES)
+                    _known_hashes = known
+                    log_step("utils", f"Loaded {count} known file hashes for duplicate checks", "debug")
+            except Exception as e:
+                _known_hashes = None  # Every check goes to the database until the next attempt
+                _known_hashes_as_of = None
+                log_step("utils", f"Could not load known file hashes: {e}", "warning")
+        return _known_hashes, _known_hashes_as_of
+
+def _remember_hash(file_hash: Optional[str]) -> None:
+    """Add a newly recorded hash to the filter, if it has been loaded"""
+    if file_hash and _known_hashes is not None:
+        with _known_hashes_lock:
+            _known_hashes.add(file_hash)
+
+class _BatchStatusFlusher:
+    """Write-behind for batch status: keeps the latest status per batch and writes them all in one UPDATE"""
+    
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.pending: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+    
+    def submit(self, batch_id, status: str) -> None:
+        with self.lock:
+            self.pending[str(batch_id)] = status  # A newer status replaces one not yet written
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="batch-status-flusher", daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+        self.wakeup.set()
+    
+    def _run(self) -> None:
+        while True:
+            self.wakeup.wait()
+            time.sleep(self.interval)  # Let a burst of updates collapse into one write
+            self.wakeup.clear()
+            self.flush()
+    
+    def write_now(self, batch_id, status: str) -> bool:
+        """Write one status immediately, superseding any queued status for the batch"""
+        with self.lock:
+            self.pending.pop(str(batch_id), None)
+        return self._write([(str(batch_id), status)])
+    
+    def flush(self) -> bool:
+        with self.lock:
+            updates, self.pending = list(self.pending.items()), {}
+        if not updates:
+            return True
+        return self._write(updates)
+    
+    def _write(self, updates) -> bool:
+        try:
+            _local_db()._execute_values(_SQL_UPDATE_BATCH_STATUSES, updates)
+            return True
+        except Exception as e:
+            log_step("utils", f"Error updating batch status: {e}", "error")
+            return False
+
+
+_batch_status_flusher = _BatchStatusFlusher()
+
 # Convenience functions for backward compatibility
 def log_step(component: str, message: str, level: str = "info") -> None:
     """Log a pipeline step"""
-    logger.log_step(component, message, level)
+    _instance('logger').log_step(component, message, level)
 
 def validate_config() -> bool:
     """Validate configuration"""
@@ -456,29 +853,23 @@ def create_media_file_record(file_path: str, file_size: int,
                            batch_id: Optional[str] = None) -> Optional[str]:
     """Create media file record with hash"""
     # Use local database manager instead of Supabase
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
+    local_db = _local_db()
     
     try:
         # Extract filename from file path
         filename = os.path.basename(file_path)
         
-        # Calculate file hash for deduplication
-        file_hash = calculate_file_hash(file_path, "md5")
+        # Calculate file hash for deduplication (same algorithm deduplicate.py compares with)
+        file_hash = calculate_file_hash(file_path, get_config_value("DEDUPLICATION_HASH_ALGORITHM", "md5"))
         if not file_hash:
             log_step("utils", f"Failed to calculate hash for {file_path}", "warning")
             file_hash = None
         
-        query = """
-            INSERT INTO media_files (filename, file_path, file_size, file_hash, source_type, batch_id, status, created_at)
-            VALUES (%s, %s, %s, %s, %s, %s, 'downloaded', %s)
-            RETURNING id
-        """
-        
-        result = local_db._execute_query(query, (filename, file_path, file_size, file_hash, source_type, batch_id, datetime.now()), fetch=True)
+        result = local_db._execute_prepared(*_SQL_INSERT_MEDIA_FILE, (filename, file_path, file_size, file_hash, source_type, batch_id), fetch=True)
         
         if result and len(result) > 0:
             file_id = str(result[0]['id'])
+            _remember_hash(file_hash)
             log_step("utils", f"Created media file record: {filename} (ID: {file_id}, Hash: {file_hash[:8] if file_hash else 'None'}...)", "info")
             return file_id
         else:
@@ -488,24 +879,60 @@ def create_media_file_record(file_path: str, file_size: int,
         log_step("utils", f"Error creating media file record: {e}", "error")
         return None
 
+def create_media_file_records(records: List[tuple]) -> List[Optional[str]]:
+    """Create media file records for (file_path, file_size, source_type, batch_id) tuples in one INSERT"""
+    local_db = _local_db()
+    
+    try:
+        rows = []
+        file_hashes = hash_files_parallel([record[0] for record in records], get_config_value("DEDUPLICATION_HASH_ALGORITHM", "md5"))
+        for (file_path, file_size, source_type, batch_id), file_hash in zip(records, file_hashes):
+            if not file_hash:
+                log_step("utils", f"Failed to calculate hash for {file_path}", "warning")
+            rows.append((os.path.basename(file_path), file_path, file_size, file_hash, source_type, batch_id, 'downloaded'))
+        
+        if not rows:
+            return []
+        
+        # RETURNING rows of a single VALUES insert come back in input order
+        try:
+            result = local_db._execute_values(_SQL_INSERT_MEDIA_FILES, rows, fetch=True)
+            file_ids = [str(row['id']) for row in result]
+        except Exception as e:
+            # One bad row fails the whole INSERT; retry row by row so the rest are still tracked
+            log_step("utils", f"Bulk media file insert failed, inserting individually: {e}", "warning")
+            file_ids = [_insert_media_file_row(row) for row in rows]
+        
+        for row, file_id in zip(rows, file_ids):
+            if file_id:
+                _remember_hash(row[3])
+        log_step("utils", f"Created {sum(1 for file_id in file_ids if file_id)} media file records", "info")
+        return file_ids
+        
+    except Exception as e:
+        log_step("utils", f"Error creating media file records: {e}", "error")
+        return [None] * len(records)
+
+def _insert_media_file_row(row: tuple) -> Optional[str]:
+    """Insert one row of a failed bulk insert (None if this row is the bad one)"""
+    try:
+        result = _local_db()._execute_prepared(*_SQL_INSERT_MEDIA_FILE, row[:6], fetch=True)
+        return str(result[0]['id']) if result else None
+    except Exception as e:
+        log_step("utils", f"Error creating media file record for {row[1]}: {e}", "error")
+        return None
+
 def create_batch_record(source_type: str, file_count: int, 
                       total_size: int) -> Optional[str]:
     """Create batch record"""
     # Use local database manager instead of Supabase
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
+    local_db = _local_db()
     
     try:
         # Convert bytes to GB for the database
         total_size_gb = total_size / (1024**3)
         
-        query = """
-            INSERT INTO batches (source_type, file_count, total_size_gb, status, created_at)
-            VALUES (%s, %s, %s, 'created', %s)
-            RETURNING id
-        """
-        
-        result = local_db._execute_query(query, (source_type, file_count, total_size_gb, datetime.now()), fetch=True)
+        result = local_db._execute_prepared(*_SQL_INSERT_BATCH, (source_type, file_count, total_size_gb), fetch=True)
         
         if result and len(result) > 0:
             return str(result[0]['id'])
@@ -520,6 +947,14 @@ def calculate_file_hash(file_path: str, algorithm: str = "sha256") -> Optional[s
     """Calculate file hash"""
     return file_manager.calculate_file_hash(file_path, algorithm)
 
+def hash_files_parallel(file_paths: List[str], algorithm: str = "sha256") -> List[Optional[str]]:
+    """Calculate hashes of many files concurrently"""
+    return file_manager.hash_files_parallel(file_paths, algorithm)
+
+def inspect_file(file_path: str) -> Optional[os.stat_result]:
+    """Stat a file once"""
+    return file_manager.inspect(file_path)
+
 def get_file_size(file_path: str) -> int:
     """Get file size"""
     return file_manager.get_file_size(file_path)
@@ -538,58 +973,50 @@ def copy_file_with_sudo(src: str, dst: str) -> bool:
     """Copy file using sudo for NAS mounts"""
     return file_manager.copy_file_with_sudo(src, dst)
 
-def update_batch_status(batch_id: int, status: str) -> bool:
+def update_batch_status(batch_id: int, status: str, queued: bool = False) -> bool:
     """Update batch status in local database"""
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
+    # queued=True is for hot loops that don't read the status back: writes land within
+    # 250 ms and at a clean exit, so True only means "queued" and a crash can drop it
+    if queued:
+        _batch_status_flusher.submit(batch_id, status)
+        return True
+    return _batch_status_flusher.write_now(batch_id, status)
+
+def iter_files_by_status(status: str, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Stream files by status from local database, batch_size rows at a time"""
+    local_db = _local_db()
     
     try:
-        query = """
-            UPDATE batches 
-            SET status = %s, updated_at = %s 
-            WHERE id = %s
-        """
-        
-        result = local_db._execute_query(query, (status, datetime.now(), batch_id))
-        return result is not None
-        
+        yield from local_db._iter_query(_SQL_SELECT_FILES_BY_STATUS, (status,), batch_size=batch_size)
     except Exception as e:
-        log_step("utils", f"Error updating batch status: {e}", "error")
-        return False
+        # Re-raise: a stream cut short must not look like the complete result
+        log_step("utils", f"Error getting files by status: {e}", "error")
+        raise
 
 def get_files_by_status(status: str) -> List[Dict[str, Any]]:
     """Get files by status from local database"""
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
-    
     try:
-        query = """
-            SELECT id, filename, file_path, file_size, file_hash, source_type, batch_id, status, created_at
-            FROM media_files 
-            WHERE status = %s
-            ORDER BY created_at DESC
-        """
-        
-        result = local_db._execute_query(query, (status,), fetch=True)
-        return result if result else []
-        
-    except Exception as e:
-        log_step("utils", f"Error getting files by status: {e}", "error")
-        return []
+        return list(iter_files_by_status(status))
+    except Exception:
+        return []  # Already logged; never a partial list
 
 def is_duplicate_file(file_hash: str) -> bool:
     """Check if file is duplicate by hash against local database"""
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
+    statement, params = _SQL_SELECT_MEDIA_FILE_BY_HASH, (file_hash,)
+    
+    # A filter miss only proves the hash is absent from the rows loaded so far; other
+    # processes may have recorded it since, so the lookup narrows to rows newer than
+    # the watermark. Values the filter can't probe (None, short, non-hex) and filter
+    # hits (possible false positives) get the full lookup
+    if _HashBloomFilter.usable(file_hash):
+        known, as_of = _known_hash_filter()
+        if known is not None and as_of is not None and file_hash not in known:
+            statement, params = _SQL_SELECT_MEDIA_FILE_BY_HASH_SINCE, (file_hash, as_of - _KNOWN_HASHES_OVERLAP)
+    
+    local_db = _local_db()
     
     try:
-        query = """
-            SELECT id FROM media_files 
-            WHERE file_hash = %s 
-            LIMIT 1
-        """
-        
-        result = local_db._execute_query(query, (file_hash,), fetch=True)
+        result = local_db._execute_prepared(*statement, params, fetch=True)
         return len(result) > 0 if result else False
         
     except Exception as e:
@@ -598,8 +1025,7 @@ def is_duplicate_file(file_hash: str) -> bool:
 
 def log_duplicate_file(file_path: str, duplicate_of: str) -> bool:
     """Log duplicate file to local database"""
-    from core.local_db_manager import get_db_manager
-    local_db = get_db_manager()
+    local_db = _local_db()
     
     try:
         # Get file IDs for the duplicate and original files
@@ -618,21 +1044,20 @@ def log_duplicate_file(file_path: str, duplicate_of: str) -> bool:
         log_step("utils", f"Error logging duplicate file: {e}", "error")
         return False
 
-def retry(max_attempts: int = 3, delay: float = 1.0):
-    """Retry decorator"""
+def retry(max_attempts: int = 3, delay: float = 1.0, 
+          exceptions: tuple = (Exception,)):
+    """Retry decorator with exponential backoff and jitter, for the given exception types only"""
     def decorator(func):
         @wraps(func)
         def wrapper(*args, **kwargs):
             for attempt in range(max_attempts):
                 try:
                     return func(*args, **kwargs)
-                except Exception as e:
+                except exceptions as e:
                     if attempt == max_attempts - 1:
                         raise e
-                    time.sleep(delay)
+                    # delay, 2*delay, 4*delay... plus jitter so failed callers don't retry in lockstep
+                    time.sleep(delay * (2 ** attempt) + random.uniform(0, delay))
             return None
         return wrapper
     return decorator
-
-# Supabase client for backward compatibility
-supabase = supabase_manager.get_client()
\ No newline at end of file
@@ -218,20 +218,19 @@ class PipelineManager:
                     supabase: Client = create_client(url, key)
                     
                     # Get total files
-                    result = supabase.table('media_files').select('id', count='exact').execute()
+                    result = supabase.table('media_files').select('id', count='exact', head=True).execute()
                     stats['total_files'] = result.count or 0
                     
                     # Get files processed today
                     today = datetime.now().date()
-                    result = supabase.table('media_files').select('id', count='exact').gte('created_at', str(today)).execute()
+                    result = supabase.table('media_files').select('id', count='exact', head=True).gte('created_at', str(today)).execute()
                     stats['files_today'] = result.count or 0
                     
-                    # Get success rate from pipeline logs
-                    result = supabase.table('pipeline_logs').select('status').execute()
-                    if result.data:
-                        total_logs = len(result.data)
-                        successful_logs = len([log for log in result.data if log.get('status') == 'success'])
-                        stats['success_rate'] = (successful_logs / total_logs) * 100 if total_logs > 0 else 0
+                    # Get success rate from pipeline logs (counts only, no rows transferred)
+                    total_logs = supabase.table('pipeline_logs').select('id', count='exact', head=True).execute().count or 0
+                    if total_logs:
+                        successful_logs = supabase.table('pipeline_logs').select('id', count='exact', head=True).eq('status', 'success').execute().count or 0
+                        stats['success_rate'] = (successful_logs / total_logs) * 100
                         
             except Exception:
                 pass
@@ -392,7 +391,7 @@ class PipelineManager:
                 'VIDEO_PRESET': 'FFmpeg compression preset (ultrafast, fast, medium, slow, default: fast). Controls encoding speed vs efficiency.',
                 
                 # ===== DEDUPLICATION SETTINGS =====
-                'DEDUPLICATION_HASH_ALGORITHM': 'Hash algorithm for duplicate detection (md5, sha1, sha256, default: md5). Used to identify duplicate files.',
+                'DEDUPLICATION_HASH_ALGORITHM': 'Hash algorithm for duplicate detection (md5, sha1, sha256, blake3, default: md5). Used to identify duplicate files.',
                 'DEDUPLICATION_BATCH_SIZE': 'Number of files to process in each deduplication batch (default: 1000). Controls memory usage.',
                 
                 # ===== SORTING SETTINGS =====
@@ -1256,11 +1255,13 @@ def get_telegram_status():
 def send_telegram_status():
     """Send pipeline status to Telegram"""
     try:
-        # Import the enhanced bot
+        # Reuse the process-wide bot
         sys.path.insert(0, str(project_root))
-        from scripts.enhanced_telegram_bot import EnhancedTelegramBot
+        from utils.telegram_notifier import get_telegram_bot
         
-        bot = EnhancedTelegramBot()
+        bot = get_telegram_bot()
+        if bot is None:
+            return jsonify({'success': False, 'message': 'Telegram bot is not configured'})
         success = bot.send_pipeline_status("manual", "Status update sent from web dashboard")
         
         if success:
@@ -1275,11 +1276,13 @@ def send_telegram_status():
 def send_telegram_summary():
     """Send daily summary to Telegram"""
     try:
-        # Import the enhanced bot
+        # Reuse the process-wide bot
         sys.path.insert(0, str(project_root))
-        from scripts.enhanced_telegram_bot import EnhancedTelegramBot
+        from utils.telegram_notifier import get_telegram_bot
         
-        bot = EnhancedTelegramBot()
+        bot = get_telegram_bot()
+        if bot is None:
+            return jsonify({'success': False, 'message': 'Telegram bot is not configured'})
         success = bot.send_daily_summary()
         
         if success:
@@ -60,3 +60,17 @@ CREATE INDEX IF NOT EXISTS idx_media_files_batch_id ON media_files(batch_id);
 CREATE INDEX IF NOT EXISTS idx_duplicate_files_hash ON duplicate_files(hash);
 CREATE INDEX IF NOT EXISTS idx_pipeline_logs_step ON pipeline_logs(step);
 CREATE INDEX IF NOT EXISTS idx_pipeline_logs_status ON pipeline_logs(status);
+
+-- Table/column metadata in one call for setup checks
+CREATE OR REPLACE FUNCTION get_schema_info(tables TEXT[])
+RETURNS JSONB
+LANGUAGE SQL STABLE
+AS $$
+    SELECT COALESCE(jsonb_object_agg(table_name, columns), '{}'::JSONB)
+    FROM (
+        SELECT table_name, jsonb_agg(column_name) AS columns
+        FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = ANY(tables)
+        GROUP BY table_name
+    ) t;
+$$;
@@ -2,6 +2,8 @@
 
 from __future__ import annotations
 
+import re
+
 TABLES = {
     "batches": """
         CREATE TABLE IF NOT EXISTS batches (
@@ -57,6 +59,44 @@ TABLES = {
     """,
 }
 
+
+_CREATE_TABLE_BLOCK_RE = re.compile(
+    r"CREATE\s+TABLE\s+(?:IF\s+NOT\s+EXISTS\s+)?([^\s(]+)\s*\((.*?)\);",
+    re.IGNORECASE | re.DOTALL,
+)
+_SQL_COMMENT_RE = re.compile(r"--[^\n]*")
+_PUNCTUATION_RE = re.compile(r"[(),]")
+
+
+def _split_top_level(body: str) -> list[str]:
+    parts: list[str] = []
+    depth = 0
+    start = 0
+    for match in _PUNCTUATION_RE.finditer(body):
+        char = match.group()
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif depth == 0:
+            parts.append(body[start:match.start()])
+            start = match.end()
+    parts.append(body[start:])
+    return parts
+
+
+def parse_table_columns(sql_text: str) -> dict[str, frozenset[str]]:
+    """Map each CREATE TABLE in sql_text to its column names."""
+    tables: dict[str, frozenset[str]] = {}
+    for match in _CREATE_TABLE_BLOCK_RE.finditer(_SQL_COMMENT_RE.sub("", sql_text)):
+        columns = (part.split() for part in _split_top_level(match.group(2)))
+        tables[match.group(1).lower()] = frozenset(tokens[0] for tokens in columns if tokens)
+    return tables
+
+
+# Expected column names per table, derived once from TABLES
+COLUMNS = parse_table_columns("\n".join(TABLES.values()))
+
 INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_media_files_hash ON media_files(file_hash);",
     "CREATE INDEX IF NOT EXISTS idx_media_files_status ON media_files(status);",
@@ -66,3 +106,21 @@ INDEXES = [
     "CREATE INDEX IF NOT EXISTS idx_pipeline_logs_status ON pipeline_logs(status);",
 ]
 
+# Returns {table: [columns]} for the given public tables, so setup checks take one round trip
+FUNCTIONS = [
+    """
+        CREATE OR REPLACE FUNCTION get_schema_info(tables TEXT[])
+        RETURNS JSONB
+        LANGUAGE SQL STABLE
+        AS $$
+            SELECT COALESCE(jsonb_object_agg(table_name, columns), '{}'::JSONB)
+            FROM (
+                SELECT table_name, jsonb_agg(column_name) AS columns
+                FROM information_schema.columns
+                WHERE table_schema = 'public' AND table_name = ANY(tables)
+                GROUP BY table_name
+            ) t;
+        $$;
+    """,
+]
+
@@ -52,13 +52,16 @@ def test_google_photos():
         print("❌ No access token")
         return _test_result(False, "Google Photos access token missing")
 
+    # One session for all three calls so they share a single keep-alive TLS connection
+    session = requests.Session()
+    session.headers.update({'Authorization': f'Bearer {access_token}'})
+
     # Test 1: Simple API call
     print("\n--- Test 1: Simple API Call ---")
     try:
         url = "https://photoslibrary.googleapis.com/v1/mediaItems"
-        headers = {'Authorization': f'Bearer {access_token}'}
 
-        response = requests.get(url, headers=headers, timeout=10)
+        response = session.get(url, timeout=10)
         print(f"Status code: {response.status_code}")
         print(f"Response headers: {dict(response.headers)}")
 
@@ -79,10 +82,9 @@ def test_google_photos():
     print("\n--- Test 2: Search API Call ---")
     try:
         url = "https://photoslibrary.googleapis.com/v1/mediaItems:search"
-        headers = {'Authorization': f'Bearer {access_token}'}
 
         search_request = {}
-        response = requests.post(url, headers=headers, json=search_request, timeout=10)
+        response = session.post(url, json=search_request, timeout=10)
         print(f"Status code: {response.status_code}")
 
         if response.status_code == 200:
@@ -100,9 +102,8 @@ def test_google_photos():
     print("\n--- Test 3: Albums API Call ---")
     try:
         url = "https://photoslibrary.googleapis.com/v1/albums"
-        headers = {'Authorization': f'Bearer {access_token}'}
 
-        response = requests.get(url, headers=headers, timeout=10)
+        response = session.get(url, timeout=10)
         print(f"Status code: {response.status_code}")
 
         if response.status_code == 200:
@@ -0,0 +1,15 @@
+import sys
+from pathlib import Path
+
+SRC_DIR = str(Path(__file__).parent.parent / "src")
+
+
+def pytest_collectstart(collector):
+    # Collecting scripts/test_*.py prepends scripts/, whose run_pipeline.py and
+    # utils.py would shadow the src modules these tests import.
+    if Path(str(collector.path)).parent.name != "tests":
+        return
+    if sys.path[:1] != [SRC_DIR]:
+        if SRC_DIR in sys.path:
+            sys.path.remove(SRC_DIR)
+        sys.path.insert(0, SRC_DIR)
@@ -0,0 +1,73 @@
+import pytest
+
+from utils import utils
+from utils.utils import _BatchStatusFlusher
+
+
+class FakeLocalDB:
+    def __init__(self):
+        self.writes = []
+
+    def _execute_values(self, query, rows, fetch=False, page_size=500):
+        self.writes.append((query, list(rows)))
+
+
+@pytest.fixture
+def local_db(monkeypatch: pytest.MonkeyPatch) -> FakeLocalDB:
+    db = FakeLocalDB()
+    monkeypatch.setattr(utils, "_local_db", lambda: db)
+    return db
+
+
+@pytest.fixture
+def exit_hooks(monkeypatch: pytest.MonkeyPatch) -> list:
+    hooks = []
+    monkeypatch.setattr(utils.atexit, "register", hooks.append)
+    return hooks
+
+
+def test_queued_updates_collapse_into_one_write(local_db, exit_hooks) -> None:
+    flusher = _BatchStatusFlusher(interval=60)  # Keep the background thread out of the way
+
+    flusher.submit("b1", "created")
+    flusher.submit("b2", "created")
+    flusher.submit("b1", "uploaded")
+
+    assert flusher.flush() is True
+    assert local_db.writes == [
+        (utils._SQL_UPDATE_BATCH_STATUSES, [("b1", "uploaded"), ("b2", "created")])
+    ]
+    assert flusher.flush() is True
+    assert len(local_db.writes) == 1
+
+
+def test_pending_updates_are_flushed_at_exit(local_db, exit_hooks) -> None:
+    flusher = _BatchStatusFlusher(interval=60)
+
+    flusher.submit("b1", "verified")
+
+    assert exit_hooks == [flusher.flush]
+    exit_hooks[0]()
+    assert local_db.writes == [(utils._SQL_UPDATE_BATCH_STATUSES, [("b1", "verified")])]
+
+
+def test_write_now_supersedes_queued_status(local_db, exit_hooks) -> None:
+    flusher = _BatchStatusFlusher(interval=60)
+
+    flusher.submit("b1", "created")
+    assert flusher.write_now("b1", "uploaded") is True
+    flusher.flush()
+
+    assert local_db.writes == [(utils._SQL_UPDATE_BATCH_STATUSES, [("b1", "uploaded")])]
+
+
+def test_update_batch_status_writes_synchronously_by_default(local_db, monkeypatch) -> None:
+    monkeypatch.setattr(utils, "_batch_status_flusher", _BatchStatusFlusher(interval=60))
+
+    assert utils.update_batch_status("b1", "uploaded") is True
+    assert local_db.writes == [(utils._SQL_UPDATE_BATCH_STATUSES, [("b1", "uploaded")])]
+
+
+def test_batch_id_is_cast_to_uuid() -> None:
+    # VALUES rows carry batch ids as text; comparing them to the uuid column needs the cast
+    assert "WHERE b.id = v.id::uuid" in utils._SQL_UPDATE_BATCH_STATUSES
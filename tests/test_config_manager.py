@@ -0,0 +1,23 @@
+import pytest
+
+from utils.utils import ConfigManager
+
+
+def test_feature_toggle_follows_environment_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = ConfigManager()
+
+    monkeypatch.setenv("ENABLE_FOLDER_DOWNLOAD", "true")
+    assert manager.get_feature_toggle("ENABLE_FOLDER_DOWNLOAD") is True
+
+    monkeypatch.setenv("ENABLE_FOLDER_DOWNLOAD", "false")
+    assert manager.get_feature_toggle("ENABLE_FOLDER_DOWNLOAD") is False
+
+
+def test_config_value_follows_environment_changes(monkeypatch: pytest.MonkeyPatch) -> None:
+    manager = ConfigManager()
+
+    monkeypatch.delenv("DEDUPLICATION_HASH_ALGORITHM", raising=False)
+    assert manager.get_config_value("DEDUPLICATION_HASH_ALGORITHM", "md5") == "md5"
+
+    monkeypatch.setenv("DEDUPLICATION_HASH_ALGORITHM", "sha256")
+    assert manager.get_config_value("DEDUPLICATION_HASH_ALGORITHM", "md5") == "sha256"
@@ -1,68 +1,53 @@
-import os
-import shutil
-import tempfile
-import unittest
 from pathlib import Path
-from unittest import mock
+
+import pytest
 
 from scripts import deduplicate
 
+_TARGET_ENV_VARS = (
+    "ORIGINALS_DIR",
+    "UPLOADED_ICLOUD_DIR",
+    "UPLOADED_PIXEL_DIR",
+    "DEDUPLICATION_DIRECTORIES",
+)
+
+
+@pytest.fixture
+def target_env(monkeypatch):
+    for name in _TARGET_ENV_VARS:
+        monkeypatch.delenv(name, raising=False)
+    return monkeypatch
+
 
-class DeduplicationTargetsTests(unittest.TestCase):
-    def test_defaults_include_uploaded_directories(self):
-        with mock.patch.dict(
-            os.environ,
-            {
-                "ORIGINALS_DIR": "/data/originals",
-                "UPLOADED_ICLOUD_DIR": "/data/uploaded/icloud",
-                "UPLOADED_PIXEL_DIR": "/data/uploaded/pixel",
-            },
-            clear=True,
-        ):
-            targets = deduplicate.get_deduplication_targets()
+def test_defaults_include_uploaded_directories(target_env):
+    target_env.setenv("ORIGINALS_DIR", "/data/originals")
+    target_env.setenv("UPLOADED_ICLOUD_DIR", "/data/uploaded/icloud")
+    target_env.setenv("UPLOADED_PIXEL_DIR", "/data/uploaded/pixel")
 
-        self.assertEqual(
-            targets,
-            [
-                ("originals", "/data/originals"),
-                ("uploaded_icloud", "/data/uploaded/icloud"),
-                ("uploaded_pixel", "/data/uploaded/pixel"),
-            ],
-        )
+    assert deduplicate.get_deduplication_targets() == [
+        ("originals", "/data/originals"),
+        ("uploaded_icloud", "/data/uploaded/icloud"),
+        ("uploaded_pixel", "/data/uploaded/pixel"),
+    ]
 
-    def test_custom_directories_appended(self):
-        with tempfile.TemporaryDirectory() as temp_dir:
-            extra_a = Path(temp_dir) / "dropbox"
-            extra_b = Path(temp_dir) / "camera_uploads"
-            extra_a.mkdir()
-            extra_b.mkdir()
 
-            with mock.patch.dict(
-                os.environ,
-                {
-                    "ORIGINALS_DIR": "/data/originals",
-                    "DEDUPLICATION_DIRECTORIES": f"{extra_a}\n{extra_b}",
-                },
-                clear=True,
-            ):
-                targets = deduplicate.get_deduplication_targets()
+def test_custom_directories_appended(target_env, tmp_path: Path):
+    extra_a = tmp_path / "dropbox"
+    extra_b = tmp_path / "camera_uploads"
+    extra_a.mkdir()
+    extra_b.mkdir()
 
-        self.assertEqual(
-            targets,
-            [
-                ("originals", "/data/originals"),
-                (extra_a.name, str(extra_a)),
-                (extra_b.name, str(extra_b)),
-            ],
-        )
+    target_env.setenv("ORIGINALS_DIR", "/data/originals")
+    target_env.setenv("DEDUPLICATION_DIRECTORIES", f"{extra_a}\n{extra_b}")
 
-    def test_missing_directory_is_skipped_gracefully(self):
-        missing_dir = os.path.join(tempfile.gettempdir(), "dedupe_missing_test")
-        if os.path.exists(missing_dir):
-            shutil.rmtree(missing_dir)
+    assert deduplicate.get_deduplication_targets() == [
+        ("originals", "/data/originals"),
+        (extra_a.name, str(extra_a)),
+        (extra_b.name, str(extra_b)),
+    ]
 
-        self.assertTrue(deduplicate.deduplicate_directory(missing_dir))
 
+def test_missing_directory_is_skipped_gracefully(tmp_path: Path):
+    missing_dir = tmp_path / "dedupe_missing_test"
 
-if __name__ == "__main__":
-    unittest.main()
+    assert deduplicate.deduplicate_directory(str(missing_dir))
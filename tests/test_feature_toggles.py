@@ -3,20 +3,22 @@ import pytest
 from scripts import utils
 
 
+_TOGGLE_ENV_VARS = frozenset({
+    "ENABLE_ICLOUD_DOWNLOAD",
+    "ENABLE_FOLDER_DOWNLOAD",
+    "ENABLE_ICLOUD_UPLOAD",
+    "ENABLE_PIXEL_UPLOAD",
+    "ENABLE_COMPRESSION",
+    "ENABLE_DEDUPLICATION",
+    "ENABLE_FILE_PREPARATION",
+    "ENABLE_SORTING",
+    "ENABLE_VERIFICATION",
+})
+
+
 @pytest.fixture(autouse=True)
 def clear_toggle_env(monkeypatch):
-    toggles = [
-        "ENABLE_ICLOUD_DOWNLOAD",
-        "ENABLE_FOLDER_DOWNLOAD",
-        "ENABLE_ICLOUD_UPLOAD",
-        "ENABLE_PIXEL_UPLOAD",
-        "ENABLE_COMPRESSION",
-        "ENABLE_DEDUPLICATION",
-        "ENABLE_FILE_PREPARATION",
-        "ENABLE_SORTING",
-        "ENABLE_VERIFICATION",
-    ]
-    for toggle in toggles:
+    for toggle in _TOGGLE_ENV_VARS:
         monkeypatch.delenv(toggle, raising=False)
 
 
@@ -0,0 +1,126 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils import utils
+from utils.utils import _HashBloomFilter
+
+
+def _md5(value: str) -> str:
+    return hashlib.md5(value.encode()).hexdigest()
+
+
+class FakeLocalDB:
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.iter_calls = []
+        self.prepared_calls = []
+
+    def _execute_query(self, query, params=None, fetch=False):
+        return [{"n": len(self.rows)}]
+
+    def _iter_query(self, query, params=None, batch_size=1000):
+        self.iter_calls.append((query, params))
+        since = params[0] if params else None
+        for file_hash, created_at in self.rows:
+            if since is None or created_at > since:
+                yield {"file_hash": file_hash, "created_at": created_at}
+
+    def _execute_prepared(self, name, query, params=(), fetch=False):
+        self.prepared_calls.append((name, params))
+        file_hash = params[0]
+        since = params[1] if len(params) > 1 else None
+        return [
+            {"id": 1}
+            for row_hash, created_at in self.rows
+            if row_hash == file_hash and (since is None or created_at > since)
+        ]
+
+
+@pytest.fixture
+def known_hashes(monkeypatch: pytest.MonkeyPatch):
+    for name in ("_known_hashes", "_known_hashes_loaded_at", "_known_hashes_as_of"):
+        monkeypatch.setattr(utils, name, None)
+
+    def install(rows):
+        db = FakeLocalDB(rows)
+        monkeypatch.setattr(utils, "_local_db", lambda: db)
+        return db
+
+    return install
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    known = _HashBloomFilter(1000)
+    hashes = [_md5(str(i)) for i in range(1000)]
+    for file_hash in hashes:
+        known.add(file_hash)
+
+    assert all(file_hash in known for file_hash in hashes)
+    assert known.count == 1000
+
+
+def test_bloom_filter_false_positive_rate_at_capacity() -> None:
+    known = _HashBloomFilter(1000)
+    for i in range(1000):
+        known.add(_md5(f"stored-{i}"))
+
+    false_positives = sum(_md5(f"probe-{i}") in known for i in range(20000))
+    assert false_positives / 20000 < 0.005
+
+
+def test_bloom_filter_ignores_unusable_hashes() -> None:
+    known = _HashBloomFilter(10)
+    known.add("abc")
+    known.add(None)
+
+    assert known.count == 0
+    assert not _HashBloomFilter.usable("abc")
+    assert not _HashBloomFilter.usable("z" * 32)
+    assert _HashBloomFilter.usable(_md5("x"))
+
+
+def test_refresh_only_loads_rows_since_watermark(known_hashes, monkeypatch: pytest.MonkeyPatch) -> None:
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    db = known_hashes([(_md5("old"), start)])
+
+    known, as_of = utils._known_hash_filter()
+    assert _md5("old") in known
+    assert as_of == start
+    assert db.iter_calls == [(utils._SQL_SELECT_KNOWN_HASHES, None)]
+
+    db.rows.append((_md5("new"), start + timedelta(minutes=1)))
+    monkeypatch.setattr(utils, "_KNOWN_HASHES_TTL", 0)
+
+    refreshed, as_of = utils._known_hash_filter()
+    assert refreshed is known
+    assert _md5("new") in refreshed
+    assert as_of == start + timedelta(minutes=1)
+    assert db.iter_calls[1] == (
+        utils._SQL_SELECT_KNOWN_HASHES_SINCE,
+        (start - utils._KNOWN_HASHES_OVERLAP,),
+    )
+
+
+def test_filter_miss_still_finds_hash_recorded_since_load(known_hashes) -> None:
+    start = datetime(2026, 1, 1, 12, 0, 0)
+    db = known_hashes([(_md5("old"), start)])
+    utils._known_hash_filter()
+
+    # Another process records a hash after this one loaded its filter
+    db.rows.append((_md5("other"), start + timedelta(seconds=30)))
+
+    assert utils.is_duplicate_file(_md5("other")) is True
+    name, params = db.prepared_calls[-1]
+    assert name == utils._SQL_SELECT_MEDIA_FILE_BY_HASH_SINCE[0]
+    assert params == (_md5("other"), start - utils._KNOWN_HASHES_OVERLAP)
+
+    assert utils.is_duplicate_file(_md5("missing")) is False
+
+
+def test_filter_hit_uses_full_lookup(known_hashes) -> None:
+    db = known_hashes([(_md5("old"), datetime(2026, 1, 1))])
+
+    assert utils.is_duplicate_file(_md5("old")) is True
+    assert db.prepared_calls[-1][0] == utils._SQL_SELECT_MEDIA_FILE_BY_HASH[0]
@@ -1,13 +1,9 @@
 """Tests for MediaPipeline download phase toggle behaviour"""
 
-from pathlib import Path
-import sys
 from typing import List
 
 import pytest
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
-
 from run_pipeline import MediaPipeline, PhaseStatus
 
 
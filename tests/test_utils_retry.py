@@ -1,9 +1,11 @@
 import unittest
+from unittest import mock
 from scripts.utils import retry
 
 
 class RetryDecoratorTests(unittest.TestCase):
-    def test_retry_succeeds_after_retries(self):
+    @mock.patch("scripts.utils.time.sleep")
+    def test_retry_succeeds_after_retries(self, mock_sleep):
         call_counter = {"count": 0}
 
         @retry(max_attempts=3, delay=0)
@@ -16,8 +18,10 @@ class RetryDecoratorTests(unittest.TestCase):
         result = flaky_function()
         self.assertEqual(result, "success")
         self.assertEqual(call_counter["count"], 3)
+        self.assertEqual(mock_sleep.call_count, 2)
 
-    def test_retry_raises_original_exception(self):
+    @mock.patch("scripts.utils.time.sleep")
+    def test_retry_raises_original_exception(self, mock_sleep):
         call_counter = {"count": 0}
 
         @retry(max_attempts=2, delay=0)
@@ -28,6 +32,7 @@ class RetryDecoratorTests(unittest.TestCase):
         with self.assertRaises(RuntimeError):
             always_fail()
         self.assertEqual(call_counter["count"], 2)
+        self.assertEqual(mock_sleep.call_count, 1)
 
 
 if __name__ == "__main__":
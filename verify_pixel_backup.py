@@ -4,13 +4,34 @@ Verify Pixel Backup Gang installation and configuration
 """
 
 import os
+import io
 import json
+import socket
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-def check_module_installation():
+BACKUP_SETTINGS = (
+    'backup_photos_enabled',
+    'backup_videos_enabled',
+    'auto_backup_enabled',
+)
+
+CONNECTIVITY_HOSTS = ('8.8.8.8', '1.1.1.1')
+
+def _run_check(check):
+    """Run a check against its own buffer, returning its result and output"""
+    out = io.StringIO()
+    try:
+        result = check(out)
+    except Exception as e:
+        print(f"❌ Check failed: {e}", file=out)
+        result = False
+    return result, out.getvalue()
+
+def check_module_installation(out):
     """Check if module is properly installed"""
-    print("🔍 Checking Pixel Backup Gang installation...")
+    print("🔍 Checking Pixel Backup Gang installation...", file=out)
     
     module_dir = "/data/adb/modules/pixel_backup_gang"
     required_files = [
@@ -19,90 +40,102 @@ def check_module_installation():
         "credentials.json"
     ]
     
-    missing_files = []
-    for file in required_files:
-        if not os.path.exists(os.path.join(module_dir, file)):
-            missing_files.append(file)
+    # One directory listing instead of a stat per required file
+    try:
+        with os.scandir(module_dir) as entries:
+            present = {entry.name for entry in entries}
+    except OSError:
+        present = set()
+    missing_files = [file for file in required_files if file not in present]
     
     if missing_files:
-        print(f"❌ Missing files: {missing_files}")
+        print(f"❌ Missing files: {missing_files}", file=out)
         return False
     else:
-        print("✅ All required files present")
+        print("✅ All required files present", file=out)
         return True
 
-def check_google_photos_backup():
+def check_google_photos_backup(out):
     """Check Google Photos backup status"""
-    print("\n📱 Checking Google Photos backup status...")
+    print("\n📱 Checking Google Photos backup status...", file=out)
     
     try:
-        # Check backup settings
-        result = subprocess.run(['settings', 'get', 'global', 'backup_photos_enabled'], 
-                              capture_output=True, text=True)
-        backup_photos = result.stdout.strip()
-        
-        result = subprocess.run(['settings', 'get', 'global', 'backup_videos_enabled'], 
-                              capture_output=True, text=True)
-        backup_videos = result.stdout.strip()
-        
-        result = subprocess.run(['settings', 'get', 'global', 'auto_backup_enabled'], 
+        # Check backup settings (one shell instead of a process per key); each value is
+        # printed as key=value so a failed or silent read can't shift the others
+        command = '; '.join(f'echo "{key}=$(settings get global {key})"' for key in BACKUP_SETTINGS)
+        result = subprocess.run(['sh', '-c', command], 
                               capture_output=True, text=True)
-        auto_backup = result.stdout.strip()
+        values = {}
+        for line in result.stdout.splitlines():
+            key, _, value = line.partition('=')
+            values[key] = value.strip()
+        backup_photos, backup_videos, auto_backup = (values.get(key, '') for key in BACKUP_SETTINGS)
         
-        print(f"Backup Photos: {backup_photos}")
-        print(f"Backup Videos: {backup_videos}")
-        print(f"Auto Backup: {auto_backup}")
+        print(f"Backup Photos: {backup_photos}", file=out)
+        print(f"Backup Videos: {backup_videos}", file=out)
+        print(f"Auto Backup: {auto_backup}", file=out)
         
         if backup_photos == '1' and backup_videos == '1' and auto_backup == '1':
-            print("✅ Google Photos backup is properly configured")
+            print("✅ Google Photos backup is properly configured", file=out)
             return True
         else:
-            print("⚠️  Google Photos backup needs configuration")
+            print("⚠️  Google Photos backup needs configuration", file=out)
             return False
             
     except Exception as e:
-        print(f"❌ Error checking backup status: {e}")
+        print(f"❌ Error checking backup status: {e}", file=out)
         return False
 
-def check_network_connectivity():
+def check_network_connectivity(out):
     """Check network connectivity"""
-    print("\n🌐 Checking network connectivity...")
+    print("\n🌐 Checking network connectivity...", file=out)
     
-    try:
-        result = subprocess.run(['ping', '-c', '1', '8.8.8.8'], 
-                              capture_output=True, timeout=10)
-        if result.returncode == 0:
-            print("✅ Network connectivity OK")
-            return True
-        else:
-            print("❌ No network connectivity")
-            return False
-    except Exception as e:
-        print(f"❌ Network check failed: {e}")
-        return False
+    # A TCP connect to public DNS needs no ping binary or ICMP permission
+    last_error = None
+    for host in CONNECTIVITY_HOSTS:
+        try:
+            with socket.create_connection((host, 53), timeout=2):
+                print("✅ Network connectivity OK", file=out)
+                return True
+        except OSError as e:
+            last_error = e
+    
+    print(f"❌ No network connectivity: {last_error}", file=out)
+    return False
 
-def check_logs():
+def check_logs(out):
     """Check module logs"""
-    print("\n📋 Checking logs...")
+    print("\n📋 Checking logs...", file=out)
     
     log_dir = "/data/adb/modules/pixel_backup_gang/logs"
-    if not os.path.exists(log_dir):
-        print("❌ Log directory not found")
-        return False
-    
     log_files = [
         "backup.log",
         "backup_manager.log",
         "service.log"
     ]
     
+    try:
+        with os.scandir(log_dir) as entries:
+            found = [entry for entry in entries if entry.name in log_files]
+    except FileNotFoundError:
+        print("❌ Log directory not found", file=out)
+        return False
+    except OSError as e:
+        print(f"❌ Cannot read log directory: {e}", file=out)
+        return False
+    
+    sizes = {}
+    for entry in found:
+        try:
+            sizes[entry.name] = entry.stat().st_size
+        except OSError:
+            pass  # e.g. a dangling symlink; reported as not found below
+    
     for log_file in log_files:
-        log_path = os.path.join(log_dir, log_file)
-        if os.path.exists(log_path):
-            size = os.path.getsize(log_path)
-            print(f"✅ {log_file}: {size} bytes")
+        if log_file in sizes:
+            print(f"✅ {log_file}: {sizes[log_file]} bytes", file=out)
         else:
-            print(f"⚠️  {log_file}: Not found")
+            print(f"⚠️  {log_file}: Not found", file=out)
     
     return True
 
@@ -120,14 +153,14 @@ def main():
         check_logs
     ]
     
+    # Checks are independent and I/O bound; run them together, report in order
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        outcomes = list(executor.map(_run_check, checks))
+    
     results = []
-    for check in checks:
-        try:
-            result = check()
-            results.append(result)
-        except Exception as e:
-            print(f"❌ Check failed: {e}")
-            results.append(False)
+    for result, output in outcomes:
+        print(output, end="")
+        results.append(result)
     
     print("\n" + "=" * 40)
     print("📊 Verification Summary")
@@ -1254,11 +1254,13 @@ def get_telegram_status():
 def send_telegram_status():
     """Send pipeline status to Telegram"""
     try:
-        # Import the enhanced bot
+        # Reuse the process-wide bot
         sys.path.insert(0, str(project_root))
-        from src.utils.enhanced_telegram_bot import EnhancedTelegramBot
+        from src.utils.telegram_notifier import get_telegram_bot
         
-        bot = EnhancedTelegramBot()
+        bot = get_telegram_bot()
+        if bot is None:
+            return jsonify({'success': False, 'message': 'Telegram bot is not configured'})
         success = bot.send_pipeline_status("manual", "Status update sent from web dashboard")
         
         if success:
@@ -1273,11 +1275,13 @@ def send_telegram_status():
 def send_telegram_summary():
     """Send daily summary to Telegram"""
     try:
-        # Import the enhanced bot
+        # Reuse the process-wide bot
         sys.path.insert(0, str(project_root))
-        from src.utils.enhanced_telegram_bot import EnhancedTelegramBot
+        from src.utils.telegram_notifier import get_telegram_bot
         
-        bot = EnhancedTelegramBot()
+        bot = get_telegram_bot()
+        if bot is None:
+            return jsonify({'success': False, 'message': 'Telegram bot is not configured'})
         success = bot.send_daily_summary()
         
         if success: